@@ -0,0 +1,119 @@
+from datetime import datetime
+
+from psycopg2.extras import execute_values
+
+import metrics
+from db import is_postgres
+from rollup import advance_streak_days, update_user_totals
+
+# Each rule is earned once `metric` (a user_totals column) reaches `threshold`.
+# `exclusive` rules need the metric strictly above the threshold.
+ACHIEVEMENT_RULES = [
+    # Streak achievements (consecutive days with at least one meal; the longest run, so back-dated logs count)
+    {'id': 'streak_7', 'name': 'Week Warrior', 'description': '7-day logging streak',
+     'points': 50, 'icon': '🔥', 'metric': 'longest_streak', 'threshold': 7},
+    {'id': 'streak_21', 'name': 'Consistency King', 'description': '21-day logging streak',
+     'points': 150, 'icon': '👑', 'metric': 'longest_streak', 'threshold': 21},
+    {'id': 'streak_42', 'name': 'Habit Master', 'description': '42-day logging streak',
+     'points': 300, 'icon': '🏆', 'metric': 'longest_streak', 'threshold': 42},
+
+    # Protein achievements
+    {'id': 'protein_500', 'name': 'Protein Rookie', 'description': '500g total protein logged',
+     'points': 30, 'icon': '💪', 'metric': 'total_protein', 'threshold': 500, 'exclusive': True},
+    {'id': 'protein_2000', 'name': 'Protein Pro', 'description': '2000g total protein logged',
+     'points': 100, 'icon': '🥩', 'metric': 'total_protein', 'threshold': 2000, 'exclusive': True},
+
+    # Meal count achievements
+    {'id': 'meals_10', 'name': 'Getting Started', 'description': '10 meals logged',
+     'points': 20, 'icon': '🍽️', 'metric': 'meals_logged', 'threshold': 10},
+    {'id': 'meals_50', 'name': 'Dedicated Logger', 'description': '50 meals logged',
+     'points': 75, 'icon': '📊', 'metric': 'meals_logged', 'threshold': 50},
+    {'id': 'meals_100', 'name': 'Century Club', 'description': '100 meals logged',
+     'points': 200, 'icon': '🎯', 'metric': 'meals_logged', 'threshold': 100},
+]
+RULES_BY_ID = {rule['id']: rule for rule in ACHIEVEMENT_RULES}
+
+PUBLIC_FIELDS = ('id', 'name', 'description', 'points', 'icon')
+
+
+def qualifying_rules(totals):
+    """Rules whose threshold the user's running totals have reached"""
+    qualified = []
+    for rule in ACHIEVEMENT_RULES:
+        value = totals.get(rule['metric']) or 0
+        if value > rule['threshold'] if rule.get('exclusive') else value >= rule['threshold']:
+            qualified.append(rule)
+    return qualified
+
+
+def award_achievements(cursor, user_id, totals):
+    """Insert every newly qualifying achievement in one batch and return them.
+
+    Already-earned keys are fetched with one set-based query; the unique
+    (user_id, achievement_key) index makes concurrent awards idempotent.
+    """
+    candidates = qualifying_rules(totals)
+    if not candidates:
+        return []
+
+    keys = [rule['id'] for rule in candidates]
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('''
+            SELECT achievement_key FROM user_achievements
+            WHERE user_id = %s AND achievement_key = ANY(%s)
+        ''', (user_id, keys))
+    else:
+        # SQLite
+        cursor.execute(f'''
+            SELECT achievement_key FROM user_achievements
+            WHERE user_id = ? AND achievement_key IN ({', '.join('?' * len(keys))})
+        ''', [user_id] + keys)
+    earned = {row['achievement_key'] for row in cursor.fetchall()}
+
+    new_rules = [rule for rule in candidates if rule['id'] not in earned]
+    if not new_rules:
+        return []
+
+    now = datetime.now()
+    rows = [(user_id, rule['id'], rule['name'], rule['description'], now, rule['points']) for rule in new_rules]
+    if is_postgres(cursor):
+        # PostgreSQL: RETURNING tells us which rows a concurrent request didn't insert first
+        inserted = execute_values(cursor, '''
+            INSERT INTO user_achievements
+            (user_id, achievement_key, achievement_name, achievement_description, earned_at, points_awarded)
+            VALUES %s
+            ON CONFLICT (user_id, achievement_key) DO NOTHING
+            RETURNING achievement_key
+        ''', rows, fetch=True)
+        inserted_keys = {row['achievement_key'] for row in inserted}
+        new_rules = [rule for rule in new_rules if rule['id'] in inserted_keys]
+    else:
+        # SQLite (writers are serialized, so every row is new)
+        cursor.executemany('''
+            INSERT OR IGNORE INTO user_achievements
+            (user_id, achievement_key, achievement_name, achievement_description, earned_at, points_awarded)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [row[:4] + (row[4].strftime('%Y-%m-%d %H:%M:%S'),) + row[5:] for row in rows])
+
+    if new_rules:
+        update_user_totals(cursor, user_id, achievement_points=sum(rule['points'] for rule in new_rules))
+        metrics.inc('achievements_awarded', len(new_rules))
+    return [{field: rule[field] for field in PUBLIC_FIELDS} for rule in new_rules]
+
+
+def evaluate_meals(cursor, user_id, days):
+    """Advance the user's streak for meals logged on `days` and award what it unlocks.
+
+    Call after the meals' update_user_totals() in the same transaction, so the
+    running totals (and on PostgreSQL the row lock) are already in place.
+    """
+    totals = advance_streak_days(cursor, user_id, days)
+    return award_achievements(cursor, user_id, totals)
+
+
+def with_icon(achievement_row):
+    """Add the rule's icon to a user_achievements row for the API response"""
+    rule = RULES_BY_ID.get(achievement_row['achievement_key'])
+    achievement_row['icon'] = rule['icon'] if rule else None
+    return achievement_row
@@ -1,45 +1,56 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_file, send_from_directory, g, has_request_context, make_response, redirect, Response
 from flask_cors import CORS
 import jwt
-import sqlite3
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
-import tensorflow as tf
 import numpy as np
-from PIL import Image
+from psycopg2.extras import execute_values
+from PIL import Image, UnidentifiedImageError
 import io
+import mimetypes
 import os
-from database import create_database
-from nutrition_data import populate_complete_nutrition_database
-import psycopg2
-from psycopg2.extras import RealDictCursor
 import gc
+import threading
+import time
+import metrics
+from achievements import evaluate_meals, with_icon
+from data_version import ETAGS_ENABLED, bump_data_version, get_data_version, make_etag, record_conditional
+from db import get_connection, is_postgres, unit_of_work
+from export import EXPORT_FORMATS, EXPORT_GZIP, EXPORT_INCLUDES, gzip_stream, stream_export
+from goal_cache import GOAL_CACHE_ENABLED, GoalCache
+from image_store import ImageWriter
+from inference import BATCH_SIZE_BUCKETS, BatchScheduler
+from inference_client import InferenceClient, InferenceUnavailable
+from meal_history import (LOG_FIELDS, LOGS_DEFAULT_PAGE_SIZE, InvalidQuery, decode_cursor, fetch_log_page,
+                          parse_fields, parse_filters)
+from migrations import run_migrations
+from model_backends import INFERENCE_BACKEND, get_backend_model_path, get_model_version, load_backend, warm_up
+from nutrition_table import NUTRITION_ESTIMATE_MODE, NUTRITION_ESTIMATE_TOP_K, NutritionTable
+from prediction_cache import PREDICTION_CACHE_ENABLED, PredictionCache, perceptual_hash
+from preprocessing import decode_image
+from rollup import get_user_totals, update_daily_totals, update_user_totals
+from storage import S3_PRESIGN_EXPIRES, get_storage
+from thumbnails import THUMBNAIL_SIZES, THUMBNAILS_AT_UPLOAD, ensure_thumbnail, render_all, thumbnail_format
 
 print("Starting NutriVision API...")
 
 # Check for model file at startup
-MODEL_PATH = 'nutritional_analysis_model.h5'
-if not os.path.exists(MODEL_PATH):
+MODEL_PATH = get_backend_model_path()
+if not MODEL_PATH or not os.path.exists(MODEL_PATH):
     print("⚠️ WARNING: Model file not found! Predictions will fail.")
-    print("Please upload nutritional_analysis_model.h5 to your repository or cloud storage.")
+    print(f"Please upload {MODEL_PATH} to your repository or cloud storage.")
 else:
-    print(f"✅ Model file found: {MODEL_PATH}")
+    print(f"✅ Model file found: {MODEL_PATH} (backend: {INFERENCE_BACKEND})")
 
-# Auto-initialize PostgreSQL tables if they don't exist
-if os.environ.get('DATABASE_URL'):
+# Create or upgrade the database schema (see migrations.py)
+if os.environ.get('AUTO_MIGRATE', '1') == '1':
     try:
-        print("Checking database tables...")
-        from init_db import init_database
-        init_database()
-        print("Database check complete")
+        print("Checking database schema...")
+        run_migrations()
     except Exception as e:
-        print(f"Database initialization warning: {e}")
-        # Don't fail - tables might already exist
-
-if not os.path.exists('nutritional_analysis_model.h5'):
-    print("WARNING: Model file not found!")
+        print(f"Database migration warning: {e}")
 
 app = Flask(__name__)
 
@@ -69,28 +80,97 @@ CORS(app, resources={
 
 # Configuration
 app.config['SECRET_KEY'] = 'your-secret-key-change-in-production'
-app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['UPLOAD_FOLDER'] = os.path.abspath('uploads')
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '0') == '1'
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+# Uploads are content-addressed, so browsers and CDNs may cache them for good
+UPLOAD_CACHE_MAX_AGE = int(os.environ.get('UPLOAD_CACHE_MAX_AGE_SECONDS', 365 * 24 * 3600))
+
+# Local disk or an S3-compatible bucket (STORAGE_BACKEND)
+storage = get_storage(app.config['UPLOAD_FOLDER'])
+
+# Uploads are written behind the request, deduplicated by content hash,
+# and get their thumbnails rendered by the writer thread
+image_writer = ImageWriter(
+    storage,
+    on_write=(lambda path, data: render_all(storage, path, data)) if THUMBNAILS_AT_UPLOAD else None
+)
+
+# 'local' loads the model in this process, 'remote' sends images to inference_server.py
+# so web workers never import TensorFlow
+INFERENCE_MODE = os.environ.get('INFERENCE_MODE', 'local')
+
+# PRELOAD_MODEL=1 loads and warms the model at startup instead of on the first request
+PRELOAD_MODEL = os.environ.get('PRELOAD_MODEL', '0') == '1'
+WARMUP_INFERENCES = int(os.environ.get('WARMUP_INFERENCES', 2))
+
 # Load model lazily to avoid memory issues
 model = None
+model_ready = False
+model_lock = threading.Lock()
+model_pid = None
 
 def get_model():
-    global model
-    if model is None:
-        print("Loading model with memory optimization...")
-        # Force garbage collection before loading
-        gc.collect()
-        
-        # Load model
-        model = tf.keras.models.load_model('nutritional_analysis_model.h5')
-        print("Model loaded successfully!")
-        
-        # Clear any cached tensors
-        tf.keras.backend.clear_session()
-        gc.collect()
+    # TensorFlow and the TFLite interpreter's thread pools don't survive fork, so each worker
+    # process builds its own (gunicorn.conf.py does it in post_worker_init with PRELOAD_MODEL=1)
+    if model is None or model_pid != os.getpid():
+        with model_lock:
+            if model is None or model_pid != os.getpid():
+                load_model()
     return model
 
+def load_model():
+    global model, model_ready, model_pid
+    start = time.perf_counter()
+    print("Loading model with memory optimization...")
+    # Force garbage collection before loading
+    gc.collect()
+    
+    # Load the configured backend (keras, compiled, tflite_fp16 or tflite_int8)
+    backend = load_backend()
+    print(f"Model loaded successfully! (backend: {backend.name})")
+    
+    # Clear any cached tensors (only the TensorFlow backends have any; TFLite must not start TF before fork)
+    if backend.name in ('keras', 'compiled'):
+        import tensorflow as tf
+        tf.keras.backend.clear_session()
+    gc.collect()
+    
+    # Run dummy inferences so the first real request doesn't pay for graph building
+    warm_up(backend, WARMUP_INFERENCES)
+    model = backend
+    model_pid = os.getpid()
+    model_ready = True
+    
+    memory = metrics.get_memory_usage()
+    metrics.set_gauge('model_time_to_ready_seconds', round(time.perf_counter() - start, 2))
+    logger.info(f"Model ready in {time.perf_counter() - start:.1f}s "
+                f"(pid {os.getpid()}, RSS {memory['rss_mb']} MB, PSS {memory.get('pss_mb', '?')} MB)")
+
+# Batches concurrent /api/predict requests into one forward pass,
+# or forwards them to the shared inference server
+predictor = None
+predictor_lock = threading.Lock()
+
+predictor_pid = None
+
+def get_predictor():
+    global predictor, predictor_pid
+    # The batching thread doesn't survive fork, so each worker process creates its own
+    if predictor is None or predictor_pid != os.getpid():
+        with predictor_lock:
+            if predictor is None or predictor_pid != os.getpid():
+                predictor_pid = os.getpid()
+                if INFERENCE_MODE == 'remote':
+                    predictor = InferenceClient()
+                else:
+                    predictor = BatchScheduler(lambda batch: get_model().predict(batch))
+    return predictor
+
+# Re-uploads and near-duplicate photos reuse the earlier prediction
+prediction_cache = PredictionCache(get_model_version()) if PREDICTION_CACHE_ENABLED else None
+
 CLASS_NAMES = ['apple_pie', 'baby_back_ribs', 'baklava', 'beef_carpaccio', 'beef_tartare', 
                'beet_salad', 'beignets', 'bibimbap', 'bread_pudding', 'breakfast_burrito',
                'bruschetta', 'caesar_salad', 'cannoli', 'caprese_salad', 'carrot_cake',
@@ -112,18 +192,60 @@ CLASS_NAMES = ['apple_pie', 'baby_back_ribs', 'baklava', 'beef_carpaccio', 'beef
                'spaghetti_bolognese', 'spaghetti_carbonara', 'spring_rolls', 'steak', 'strawberry_shortcake',
                'sushi', 'tacos', 'takoyaki', 'tiramisu', 'tuna_tartare', 'waffles']
 
+# food_nutrition rows aligned with CLASS_NAMES, loaded once per worker
+nutrition_table = NutritionTable(CLASS_NAMES)
+
+# Each user's active goal, written through by set_user_goals
+goal_cache = GoalCache() if GOAL_CACHE_ENABLED else None
+
 # Database helper
 def get_db():
-    DATABASE_URL = os.environ.get('DATABASE_URL')
-    if DATABASE_URL:
-        # Production: PostgreSQL
-        conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
-    else:
-        # Development: SQLite
-        conn = sqlite3.connect('nutrition_app.db')
-        conn.row_factory = sqlite3.Row
+    # Production: pooled PostgreSQL connection. Development: persistent per-thread SQLite connection.
+    # conn.close() hands the connection back to the pool.
+    conn = get_connection()
+    if has_request_context():
+        # Safety net: anything an endpoint forgets to close is released at the end of the request
+        g.setdefault('db_connections', []).append(conn)
     return conn
 
+@app.teardown_request
+def release_db_connections(exc):
+    for conn in g.pop('db_connections', []):
+        conn.close()
+
+def fetch_active_goal(cursor, user_id):
+    """Read the user's active goal row straight from the database (None if they have none)"""
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('''
+            SELECT * FROM user_goals 
+            WHERE user_id = %s AND is_active = TRUE
+            ORDER BY goal_id DESC LIMIT 1
+        ''', (user_id,))
+    else:
+        # SQLite
+        cursor.execute('''
+            SELECT * FROM user_goals 
+            WHERE user_id = ? AND is_active = TRUE
+            ORDER BY goal_id DESC LIMIT 1
+        ''', (user_id,))
+    
+    goal = cursor.fetchone()
+    return dict(goal) if goal else None
+
+def get_active_goal(cursor, user_id):
+    """The user's active goal row, from the goal cache when possible"""
+    # Responses tagged by conditional_get read it fresh, so a goal another worker changed is never
+    # served under the new ETag (unchanged repeats are answered with a 304 before getting here)
+    if goal_cache is None or g.get('etag_user_id') == user_id:
+        return fetch_active_goal(cursor, user_id)
+    
+    found, goal, generation = goal_cache.get(user_id)
+    if not found:
+        goal = fetch_active_goal(cursor, user_id)
+        goal_cache.fill(user_id, goal, generation)
+    return goal
+
 # JWT token decorator
 def token_required(f):
     @wraps(f)
@@ -145,6 +267,39 @@ def token_required(f):
     
     return decorated
 
+# Conditional GET decorator (goes under @token_required)
+def conditional_get(f):
+    """Tag the response with an ETag from the user's data version.
+    
+    A matching If-None-Match gets a 304 after one version lookup, without
+    running the endpoint's queries.
+    """
+    @wraps(f)
+    def decorated(current_user_id, *args, **kwargs):
+        if not ETAGS_ENABLED:
+            return f(current_user_id, *args, **kwargs)
+        
+        # Read the version before the data, so a concurrent write can only make the ETag stale, never too new
+        conn = get_db()
+        version = get_data_version(conn.cursor(), current_user_id)
+        conn.close()
+        g.etag_user_id = current_user_id
+        
+        etag = make_etag(current_user_id, version, request.full_path, datetime.now().date())
+        if request.if_none_match.contains_weak(etag):
+            record_conditional(not_modified=True)
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            return response
+        
+        record_conditional(not_modified=False)
+        response = make_response(f(current_user_id, *args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag, weak=True)
+        return response
+    
+    return decorated
+
 # Authentication endpoints
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -160,7 +315,7 @@ def register():
     cursor = conn.cursor()
     
     # Check if user exists
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('SELECT user_id FROM users WHERE username = %s OR email = %s', (username, email))
     else:
@@ -176,7 +331,7 @@ def register():
     
     # Use a single transaction for both inserts
     try:
-        if hasattr(cursor, 'execute'):
+        if is_postgres(cursor):
             # PostgreSQL with RETURNING
             cursor.execute('''
                 INSERT INTO users (username, email, password_hash)
@@ -197,7 +352,7 @@ def register():
             return jsonify({'message': 'Registration failed'}), 500
         
         # Create default goal
-        if hasattr(cursor, 'execute'):
+        if is_postgres(cursor):
             # PostgreSQL
             cursor.execute('''
                 INSERT INTO user_goals (user_id, weekly_points_target, start_date)
@@ -244,7 +399,7 @@ def login():
     cursor = conn.cursor()
     
     # Check if identifier is username or email
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('SELECT * FROM users WHERE username = %s OR email = %s', (identifier, identifier))
     else:
@@ -262,7 +417,7 @@ def login():
         return jsonify({'message': 'Invalid password'}), 401
     
     # Update last login
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('UPDATE users SET last_login = %s WHERE user_id = %s', 
                        (datetime.now(), user['user_id']))
@@ -296,109 +451,225 @@ def predict_food(current_user_id):
     
     file = request.files['image']
     meal_type = request.form.get('meal_type', 'other')
+    estimate_mode = request.form.get('estimate', NUTRITION_ESTIMATE_MODE)
     
-    # Preprocess image
-    img = Image.open(io.BytesIO(file.read())).convert('RGB')
-    img = img.resize((224, 224))
-    img_array = np.array(img)
-    img_array = tf.keras.applications.mobilenet_v2.preprocess_input(img_array)
-    img_array = np.expand_dims(img_array, axis=0)
-    
-    # Predict
-    predictions = get_model().predict(img_array)
-    top_idx = np.argmax(predictions[0])
-    confidence = float(predictions[0][top_idx])
-    food_name = CLASS_NAMES[top_idx]
-    
-    # Get nutrition info
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('SELECT * FROM food_nutrition WHERE food_name = %s', (food_name,))
-    else:
-        # SQLite
-        cursor.execute('SELECT * FROM food_nutrition WHERE food_name = ?', (food_name,))
+    # Decode at reduced resolution straight to 224x224
+    data = file.read()
+    img = decode_image(data)
     
-    nutrition = cursor.fetchone()
+    # Check the cache for this or a near-identical photo
+    image_hash = perceptual_hash(img)
+    predictions = prediction_cache.get(image_hash) if prediction_cache else None
     
-    if nutrition:
-        nutrition_data = dict(nutrition)
-    else:
-        # Default values if not in database
-        nutrition_data = {
-            'calories': 250,
-            'protein': 10,
-            'carbs': 30,
-            'fat': 10,
-            'health_score': 50
-        }
+    if predictions is None:
+        # Raw pixels are scaled to [-1, 1] directly into the batch's input buffer
+        pixels = np.asarray(img)
+        
+        # Predict (batched with other concurrent requests)
+        try:
+            predictions = get_predictor().predict(pixels)
+        except InferenceUnavailable:
+            return jsonify({'message': 'Prediction service is unavailable, please try again'}), 503
+        
+        if prediction_cache:
+            prediction_cache.put(image_hash, predictions)
     
-    # Fetch user's goal to adjust points
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT goal_type FROM user_goals 
-            WHERE user_id = %s AND is_active = 1
-            ORDER BY goal_id DESC LIMIT 1
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT goal_type FROM user_goals 
-            WHERE user_id = ? AND is_active = 1
-            ORDER BY goal_id DESC LIMIT 1
-        ''', (current_user_id,))
+    top_idx = np.argmax(predictions)
+    confidence = float(predictions[top_idx])
+    food_name = CLASS_NAMES[top_idx]
     
-    goal_row = cursor.fetchone()
-    goal_type = goal_row['goal_type'] if goal_row else 'maintain'
+    # Store the original upload in the background, named by its content hash
+    filename = image_writer.store(data)
     
-    # Calculate points with goal consideration
-    points = calculate_points(nutrition_data, goal_type)
+    # Lookups, log insert and weekly progress in one transaction
+    with unit_of_work() as cursor:
+        nutrition_data = None
+        if estimate_mode == 'weighted':
+            # Blend the top-k classes' nutrition by their probabilities
+            top_k = request.form.get('top_k', NUTRITION_ESTIMATE_TOP_K, type=int)
+            nutrition_data = nutrition_table.estimate(cursor, predictions, top_k)
+        nutrition_data, points, goal_type, new_achievements = log_meal(
+            cursor, current_user_id, food_name, confidence, filename, meal_type, nutrition_data)
     
-    # Save image
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"{current_user_id}_{timestamp}.jpg"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    img.save(filepath)
+    return jsonify({
+        'food_name': food_name.replace('_', ' ').title(),
+        'confidence': confidence,
+        'nutrition': nutrition_data,
+        'points_awarded': points,
+        'goal_type': goal_type,  # Optional: return goal type so frontend can show context
+        'new_achievements': new_achievements
+    }), 200
+
+# Several photos in one request: ?estimate= and top_k as for /api/predict, plus one
+# meal_type for all images or one per image
+BATCH_PREDICT_MAX_IMAGES = int(os.environ.get('BATCH_PREDICT_MAX_IMAGES', 20))
+DECODE_THREADS = int(os.environ.get('DECODE_THREADS', 4))
+
+def decode_upload(data):
+    """Decoded image, or None if the bytes aren't an image Pillow can read"""
+    try:
+        return decode_image(data)
+    except Exception:
+        return None
+
+@app.route('/api/predict/batch', methods=['POST'])
+@token_required
+def predict_food_batch(current_user_id):
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({'message': 'No images provided'}), 400
+    if len(files) > BATCH_PREDICT_MAX_IMAGES:
+        return jsonify({'message': f'At most {BATCH_PREDICT_MAX_IMAGES} images per request'}), 413
+    
+    meal_types = request.form.getlist('meal_type') or ['other']
+    if len(meal_types) not in (1, len(files)):
+        return jsonify({'message': 'Send one meal_type for all images or one per image'}), 400
+    if len(meal_types) == 1:
+        meal_types = meal_types * len(files)
+    estimate_mode = request.form.get('estimate', NUTRITION_ESTIMATE_MODE)
+    top_k = request.form.get('top_k', NUTRITION_ESTIMATE_TOP_K, type=int)
+    
+    # Decode on a thread pool (Pillow releases the GIL while decoding)
+    uploads = [file.read() for file in files]
+    with ThreadPoolExecutor(max_workers=max(1, min(DECODE_THREADS, len(uploads)))) as pool:
+        images = list(pool.map(decode_upload, uploads))
+    
+    # Cached predictions first, then one batched forward pass for the rest
+    hashes = [perceptual_hash(img) if img is not None else None for img in images]
+    predictions = [prediction_cache.get(h) if prediction_cache and img is not None else None
+                   for img, h in zip(images, hashes)]
+    pending = [i for i, img in enumerate(images) if img is not None and predictions[i] is None]
+    if pending:
+        try:
+            vectors = get_predictor().predict_many([np.asarray(images[i]) for i in pending])
+        except InferenceUnavailable:
+            return jsonify({'message': 'Prediction service is unavailable, please try again'}), 503
+        for i, vector in zip(pending, vectors):
+            predictions[i] = vector
+            if prediction_cache:
+                prediction_cache.put(hashes[i], vector)
+    metrics.observe('batch_predict_images', len(files), BATCH_SIZE_BUCKETS)
+    
+    # Queue the identified uploads for storage, then log their meals in one transaction
+    results = [None] * len(files)
+    meals, meal_indexes = [], []
+    logged_at = datetime.now()
+    for i, img in enumerate(images):
+        if img is None:
+            results[i] = {'index': i, 'filename': files[i].filename, 'error': 'Could not decode image'}
+            continue
+        top_idx = int(np.argmax(predictions[i]))
+        filename = image_writer.store(uploads[i])
+        meals.append({'food_name': CLASS_NAMES[top_idx], 'confidence': float(predictions[i][top_idx]),
+                      'image_path': filename, 'meal_type': meal_types[i], 'logged_at': logged_at})
+        meal_indexes.append(i)
+    
+    with unit_of_work() as cursor:
+        if estimate_mode == 'weighted':
+            # Blend the top-k classes' nutrition by their probabilities
+            for i, meal in zip(meal_indexes, meals):
+                meal['nutrition'] = nutrition_table.estimate(cursor, predictions[i], top_k)
+        
+        goal_type, new_achievements = None, []
+        if meals:
+            logged, goal_type, new_achievements = log_meals(cursor, current_user_id, meals)
+            for i, meal, (nutrition_data, points) in zip(meal_indexes, meals, logged):
+                results[i] = {
+                    'index': i,
+                    'filename': files[i].filename,
+                    'food_name': meal['food_name'].replace('_', ' ').title(),
+                    'confidence': meal['confidence'],
+                    'nutrition': nutrition_data,
+                    'points_awarded': points
+                }
     
-    # Log food
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
+    return jsonify({
+        'results': results,
+        'goal_type': goal_type,
+        'new_achievements': new_achievements
+    }), 200 if meals else 400
+
+def log_meal(cursor, user_id, food_name, confidence, image_path, meal_type, nutrition_data=None):
+    """Log one identified meal: nutrition and goal lookups, food_logs insert, progress and achievements.
+    
+    Runs on the caller's cursor so it can share a unit_of_work() transaction.
+    Pass nutrition_data to log an estimate instead of the class's own row.
+    """
+    # Log food (logged_at is set here so the daily rollup uses the same day)
+    meal = {'food_name': food_name, 'confidence': confidence, 'image_path': image_path,
+            'meal_type': meal_type, 'logged_at': datetime.now(), 'nutrition': nutrition_data}
+    logged, goal_type, new_achievements = log_meals(cursor, user_id, [meal])
+    nutrition_data, points = logged[0]
+    return nutrition_data, points, goal_type, new_achievements
+
+def _add_to_group(groups, key, points, nutrition):
+    group = groups.setdefault(key, {'points': 0, 'meals': 0, 'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0})
+    group['points'] += points
+    group['meals'] += 1
+    for macro in ('calories', 'protein', 'carbs', 'fat'):
+        group[macro] += nutrition[macro]
+
+def log_meals(cursor, user_id, meals):
+    """Log a batch of identified meals for one user on the caller's transaction.
+    
+    Each meal is a dict with food_name, confidence, image_path, meal_type,
+    logged_at (datetime) and optionally nutrition. The rows go in with one
+    batched insert, and weekly progress, the daily rollup, lifetime totals,
+    streaks and achievements get one grouped update each rather than one
+    per meal. Returns ([(nutrition, points) per meal], goal_type, new_achievements).
+    """
+    # Fetch user's goal once to adjust points
+    goal = get_active_goal(cursor, user_id)
+    goal_type = goal['goal_type'] if goal else 'maintain'
+    
+    logged, rows, weeks, days = [], [], {}, {}
+    for meal in meals:
+        # Get nutrition info from the in-memory table (defaults if not in database)
+        nutrition_data = meal.get('nutrition') or nutrition_table.lookup(cursor, meal['food_name'])
+        points = calculate_points(nutrition_data, goal_type)
+        logged.append((nutrition_data, points))
+        
+        logged_at = meal['logged_at']
+        rows.append((user_id, meal['food_name'], meal['confidence'], meal['image_path'], meal['meal_type'],
+                     nutrition_data['calories'], nutrition_data['protein'], nutrition_data['carbs'],
+                     nutrition_data['fat'], points, logged_at))
+        day = logged_at.date()
+        _add_to_group(weeks, day - timedelta(days=day.weekday()), points, nutrition_data)
+        _add_to_group(days, day, points, nutrition_data)
+    
+    if is_postgres(cursor):
+        # PostgreSQL: one multi-row INSERT
+        execute_values(cursor, '''
             INSERT INTO food_logs 
             (user_id, food_name, confidence_score, image_path, meal_type, 
-             calories, protein, carbs, fat, points_awarded)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (current_user_id, food_name, confidence, filename, meal_type,
-              nutrition_data['calories'], nutrition_data['protein'], 
-              nutrition_data['carbs'], nutrition_data['fat'], points))
+             calories, protein, carbs, fat, points_awarded, logged_at)
+            VALUES %s
+        ''', rows, page_size=max(len(rows), 1))
     else:
         # SQLite
-        cursor.execute('''
+        cursor.executemany('''
             INSERT INTO food_logs 
             (user_id, food_name, confidence_score, image_path, meal_type, 
-             calories, protein, carbs, fat, points_awarded)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (current_user_id, food_name, confidence, filename, meal_type,
-              nutrition_data['calories'], nutrition_data['protein'], 
-              nutrition_data['carbs'], nutrition_data['fat'], points))
-    
-    conn.commit()
-    
-    # Update weekly progress
-    update_weekly_progress(current_user_id, points, nutrition_data)
-    
-    conn.close()
-    
-    return jsonify({
-        'food_name': food_name.replace('_', ' ').title(),
-        'confidence': confidence,
-        'nutrition': nutrition_data,
-        'points_awarded': points,
-        'goal_type': goal_type  # Optional: return goal type so frontend can show context
-    }), 200
+             calories, protein, carbs, fat, points_awarded, logged_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [row[:-1] + (row[-1].strftime('%Y-%m-%d %H:%M:%S'),) for row in rows])
+    
+    # Update weekly progress and the daily rollup once per week/day touched, then lifetime totals
+    for week_start, group in sorted(weeks.items()):
+        update_weekly_progress(cursor, user_id, group['points'], group, week_start, group['meals'])
+    for day, group in sorted(days.items()):
+        update_daily_totals(cursor, user_id, day, group['points'], group, group['meals'])
+    update_user_totals(cursor, user_id, sum(g['points'] for g in days.values()),
+                       {macro: sum(g[macro] for g in days.values()) for macro in ('calories', 'protein', 'carbs', 'fat')},
+                       len(rows))
+    
+    # Advance the streak and award anything these meals unlocked
+    new_achievements = evaluate_meals(cursor, user_id, list(days))
+    
+    # Invalidate the user's cached read responses (ETags)
+    bump_data_version(cursor, user_id)
+    
+    return logged, goal_type, new_achievements
 
 def calculate_points(nutrition, goal_type='maintain'):
     """Calculate points based on nutritional value and user goal"""
@@ -470,149 +741,188 @@ def calculate_points(nutrition, goal_type='maintain'):
     # Ensure minimum and maximum bounds
     return max(min(base_points, 25), -15)  # Between -15 and +25 points
 
-def update_weekly_progress(user_id, points, nutrition):
-    """Update weekly progress for the user"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    today = datetime.now().date()
-    week_start = today - timedelta(days=today.weekday())
+def update_weekly_progress(cursor, user_id, points, nutrition, day=None, meals=1):
+    """Add meals to the user's progress for the week containing `day` (default today), on the caller's transaction"""
+    day = day or datetime.now().date()
+    week_start = day - timedelta(days=day.weekday())
     week_end = week_start + timedelta(days=6)
     
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('''
             INSERT INTO weekly_progress 
             (user_id, week_start_date, week_end_date, total_points, meals_logged,
              total_calories, total_protein, total_carbs, total_fat)
-            VALUES (%s, %s, %s, %s, 1, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             ON CONFLICT(user_id, week_start_date) DO UPDATE SET
                 total_points = weekly_progress.total_points + %s,
-                meals_logged = weekly_progress.meals_logged + 1,
+                meals_logged = weekly_progress.meals_logged + %s,
                 total_calories = weekly_progress.total_calories + %s,
                 total_protein = weekly_progress.total_protein + %s,
                 total_carbs = weekly_progress.total_carbs + %s,
                 total_fat = weekly_progress.total_fat + %s
-        ''', (user_id, week_start, week_end, points,
+        ''', (user_id, week_start, week_end, points, meals,
               nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat'],
-              points, nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
+              points, meals, nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
     else:
         # SQLite
         cursor.execute('''
             INSERT INTO weekly_progress 
             (user_id, week_start_date, week_end_date, total_points, meals_logged,
              total_calories, total_protein, total_carbs, total_fat)
-            VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ON CONFLICT(user_id, week_start_date) DO UPDATE SET
                 total_points = total_points + ?,
-                meals_logged = meals_logged + 1,
+                meals_logged = meals_logged + ?,
                 total_calories = total_calories + ?,
                 total_protein = total_protein + ?,
                 total_carbs = total_carbs + ?,
                 total_fat = total_fat + ?
-        ''', (user_id, week_start, week_end, points,
+        ''', (user_id, week_start, week_end, points, meals,
               nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat'],
-              points, nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
-    
-    conn.commit()
-    conn.close()
+              points, meals, nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
 
 # Get user progress
 @app.route('/api/progress', methods=['GET'])
 @token_required
+@conditional_get
 def get_progress(current_user_id):
     conn = get_db()
-    cursor = conn.cursor()
-    
-    today = datetime.now().date()
-    week_start = today - timedelta(days=today.weekday())
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT * FROM weekly_progress 
-            WHERE user_id = %s AND week_start_date = %s
-        ''', (current_user_id, week_start))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT * FROM weekly_progress 
-            WHERE user_id = ? AND week_start_date = ?
-        ''', (current_user_id, week_start))
-    
-    progress = cursor.fetchone()
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT weekly_points_target FROM user_goals 
-            WHERE user_id = %s AND is_active = 1
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT weekly_points_target FROM user_goals 
-            WHERE user_id = ? AND is_active = 1
-        ''', (current_user_id,))
-    
-    goal = cursor.fetchone()
+    progress = DashboardLoader(conn.cursor(), current_user_id).progress()
     conn.close()
     
-    if not progress:
-        return jsonify({
-            'total_points': 0,
-            'meals_logged': 0,
-            'target': goal['weekly_points_target'] if goal else 100,
-            'week_start': str(week_start)
-        }), 200
-    
-    return jsonify({
-        'total_points': progress['total_points'],
-        'meals_logged': progress['meals_logged'],
-        'total_calories': progress['total_calories'],
-        'target': goal['weekly_points_target'] if goal else 100,
-        'week_start': str(week_start)
-    }), 200
+    return jsonify(progress), 200
 
-# Get user logs
+# Get user logs: ?limit=&cursor=&from=&to=&meal_type=&food_name=&fields=log_id,food_name,...
 @app.route('/api/logs', methods=['GET'])
 @token_required
+@conditional_get
 def get_logs(current_user_id):
-    limit = request.args.get('limit', 10, type=int)
+    limit = request.args.get('limit', LOGS_DEFAULT_PAGE_SIZE, type=int)
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        filters = parse_filters(request.args)
+        after = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except InvalidQuery as e:
+        return jsonify({'message': str(e), 'available_fields': LOG_FIELDS}), 400
+    
+    conn = get_db()
+    logs, next_cursor = fetch_log_page(conn.cursor(), current_user_id, fields, filters, after, limit)
+    conn.close()
     
+    return jsonify({'logs': logs, 'next_cursor': next_cursor}), 200
+
+# Bulk import of already-identified meals (offline clients, other apps): one transaction per request
+IMPORT_MAX_MEALS = int(os.environ.get('IMPORT_MAX_MEALS', 1000))
+MEALS_PER_SECOND_BUCKETS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000]
+
+def parse_import_meal(cursor, item, now):
+    """Validate one item of an import request into a log_meals() meal"""
+    if not isinstance(item, dict):
+        raise ValueError('must be an object')
+    food_name = str(item.get('food_name') or '').strip().lower().replace(' ', '_')
+    # Only foods with a food_nutrition row, so imported meals never get zero macros
+    if not nutrition_table.in_database(cursor, food_name):
+        raise ValueError(f"unknown food_name: {item.get('food_name')!r}")
+    try:
+        logged_at = datetime.fromisoformat(str(item.get('logged_at')))
+    except ValueError:
+        raise ValueError('logged_at must be an ISO 8601 timestamp')
+    if logged_at.tzinfo is not None:
+        # Stored timestamps are naive server-local time, like datetime.now()
+        logged_at = logged_at.astimezone().replace(tzinfo=None)
+    if logged_at > now + timedelta(minutes=5):
+        raise ValueError('logged_at is in the future')
+    meal_type = str(item.get('meal_type') or 'other').strip().lower()
+    if len(meal_type) > 20:
+        raise ValueError('meal_type is longer than 20 characters')
+    confidence = item.get('confidence', 1.0)
+    if not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+        raise ValueError('confidence must be a number between 0 and 1')
+    return {'food_name': food_name, 'confidence': float(confidence), 'image_path': '',
+            'meal_type': meal_type, 'logged_at': logged_at}
+
+@app.route('/api/logs/import', methods=['POST'])
+@token_required
+def import_meals(current_user_id):
+    data = request.get_json(silent=True) or {}
+    items = data.get('meals')
+    if not isinstance(items, list) or not items:
+        return jsonify({'message': 'meals must be a non-empty list'}), 400
+    if len(items) > IMPORT_MAX_MEALS:
+        return jsonify({'message': f'At most {IMPORT_MAX_MEALS} meals per request'}), 413
+    
+    now = datetime.now()
+    meals, errors = [], []
     conn = get_db()
     cursor = conn.cursor()
+    for index, item in enumerate(items):
+        try:
+            meals.append(parse_import_meal(cursor, item, now))
+        except ValueError as e:
+            errors.append({'index': index, 'message': str(e)})
+    conn.close()
+    if errors:
+        # All or nothing, so a client can fix its batch and resend it as is
+        return jsonify({'message': 'Invalid meals, nothing was imported', 'errors': errors}), 400
     
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT * FROM food_logs 
-            WHERE user_id = %s 
-            ORDER BY logged_at DESC 
-            LIMIT %s
-        ''', (current_user_id, limit))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT * FROM food_logs 
-            WHERE user_id = ? 
-            ORDER BY logged_at DESC 
-            LIMIT ?
-        ''', (current_user_id, limit))
+    start = time.perf_counter()
+    with unit_of_work() as cursor:
+        logged, goal_type, new_achievements = log_meals(cursor, current_user_id, meals)
+    elapsed = time.perf_counter() - start
     
-    logs = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    metrics.inc('meals_imported', len(meals))
+    metrics.observe('meal_import_ms', elapsed * 1000)
+    metrics.observe('meal_import_meals_per_second', len(meals) / max(elapsed, 1e-6), MEALS_PER_SECOND_BUCKETS)
+    
+    return jsonify({
+        'imported': len(meals),
+        'points_awarded': sum(points for _, points in logged),
+        'goal_type': goal_type,
+        'new_achievements': new_achievements
+    }), 201
+
+# Export the whole meal history: ?format=ndjson|csv&include=weekly_progress,achievements
+# plus the /api/logs filters and fields
+@app.route('/api/logs/export', methods=['GET'])
+@token_required
+def export_logs(current_user_id):
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f'Unknown format: {fmt}', 'available_formats': list(EXPORT_FORMATS)}), 400
+    include = [i.strip() for i in request.args.get('include', '').split(',') if i.strip()]
+    unknown = [i for i in include if i not in EXPORT_INCLUDES]
+    if unknown:
+        return jsonify({'message': f"Unknown include: {', '.join(unknown)}", 'available_includes': EXPORT_INCLUDES}), 400
+    if fmt == 'csv' and 'achievements' in include:
+        return jsonify({'message': 'achievements can only be included in NDJSON exports'}), 400
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        filters = parse_filters(request.args)
+    except InvalidQuery as e:
+        return jsonify({'message': str(e), 'available_fields': LOG_FIELDS}), 400
+    
+    body = stream_export(current_user_id, fmt, fields, filters, include)
+    headers = {
+        'Content-Disposition': f'attachment; filename=meals_{datetime.now().strftime("%Y%m%d")}.{fmt}',
+        'Vary': 'Accept-Encoding'
+    }
+    if EXPORT_GZIP and request.accept_encodings['gzip']:
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
     
-    return jsonify({'logs': logs}), 200
+    metrics.inc('exports')
+    return Response(body, mimetype=EXPORT_FORMATS[fmt], headers=headers)
 
 # Get user profile
 @app.route('/api/user/profile', methods=['GET'])
 @token_required
+@conditional_get
 def get_user_profile(current_user_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('SELECT user_id, username, email, created_at FROM users WHERE user_id = %s', (current_user_id,))
     else:
@@ -644,7 +954,7 @@ def update_user_profile(current_user_id):
     cursor = conn.cursor()
     
     try:
-        if hasattr(cursor, 'execute'):
+        if is_postgres(cursor):
             # PostgreSQL
             cursor.execute('''
                 UPDATE users 
@@ -659,6 +969,7 @@ def update_user_profile(current_user_id):
                 WHERE user_id = ?
             ''', (username, email, current_user_id))
         
+        bump_data_version(cursor, current_user_id)
         conn.commit()
         conn.close()
         return jsonify({'message': 'Profile updated successfully'}), 200
@@ -677,7 +988,7 @@ def change_password(current_user_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('SELECT password_hash FROM users WHERE user_id = %s', (current_user_id,))
     else:
@@ -692,7 +1003,7 @@ def change_password(current_user_id):
     
     new_password_hash = generate_password_hash(new_password)
     
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('UPDATE users SET password_hash = %s WHERE user_id = %s', (new_password_hash, current_user_id))
     else:
@@ -704,10 +1015,48 @@ def change_password(current_user_id):
     
     return jsonify({'message': 'Password changed successfully'}), 200
 
-# Serve uploaded images
-@app.route('/uploads/<filename>')
+# Serve uploaded images (meal photos live under sharded content-hash paths).
+# ?size=64|200|480 returns a square thumbnail, WebP for clients that accept it.
+@app.route('/uploads/<path:filename>')
 def serve_upload(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    size = request.args.get('size', type=int)
+    if size is not None and size not in THUMBNAIL_SIZES:
+        return jsonify({'message': 'Unknown size', 'available_sizes': THUMBNAIL_SIZES}), 400
+    if safe_join(app.config['UPLOAD_FOLDER'], filename) is None:
+        return jsonify({'message': 'Not found'}), 404
+    
+    # Still in the write-behind queue: serve it (or its thumbnail) from memory
+    data = image_writer.pending(filename)
+    if size is not None:
+        accepts_webp = any(mimetype == 'image/webp' and quality > 0 for mimetype, quality in request.accept_mimetypes)
+        try:
+            filename = ensure_thumbnail(storage, filename, size, thumbnail_format(accepts_webp), data)
+        except (FileNotFoundError, UnidentifiedImageError):
+            return jsonify({'message': 'Not found'}), 404
+        data = None
+    
+    if data is not None:
+        response = send_file(io.BytesIO(data), mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                             etag=os.path.splitext(os.path.basename(filename))[0], max_age=UPLOAD_CACHE_MAX_AGE)
+    elif storage.presigned:
+        # The client downloads straight from the bucket; the redirect is only reused while its URL is valid
+        response = redirect(storage.url(filename))
+        response.cache_control.private = True
+        response.cache_control.max_age = S3_PRESIGN_EXPIRES // 2
+        if size is not None:
+            response.vary.add('Accept')
+        return response
+    else:
+        # Sent with sendfile by the WSGI server's file wrapper (or X-Sendfile when USE_X_SENDFILE=1);
+        # ETag/Last-Modified make repeat requests 304s
+        response = send_from_directory(storage.root, filename, max_age=UPLOAD_CACHE_MAX_AGE)
+    
+    # Stored files never change: a new upload gets a new name
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    if size is not None:
+        response.vary.add('Accept')
+    return response
 
 # Upload profile picture
 @app.route('/api/user/upload-profile-picture', methods=['POST'])
@@ -721,39 +1070,28 @@ def upload_profile_picture(current_user_id):
     if file.filename == '':
         return jsonify({'message': 'No file selected'}), 400
     
-    # Save image
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    filename = f"profile_{current_user_id}_{timestamp}.jpg"
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    data = file.read()
+    try:
+        Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        return jsonify({'message': 'File is not an image'}), 400
     
-    # Save and resize image
-    img = Image.open(file)
-    img = img.resize((200, 200))
-    img.save(filepath)
+    # Store the original in the background; clients show it via ?size=200,
+    # a centre-cropped thumbnail that keeps the aspect ratio
+    filename = image_writer.store(data)
     
     # Update user record with profile picture path
     conn = get_db()
     cursor = conn.cursor()
     
-    # First check if column exists, if not add it
-    try:
-        if hasattr(cursor, 'execute'):
-            # PostgreSQL
-            cursor.execute('UPDATE users SET profile_picture = %s WHERE user_id = %s', (filename, current_user_id))
-        else:
-            # SQLite
-            cursor.execute('UPDATE users SET profile_picture = ? WHERE user_id = ?', (filename, current_user_id))
-    except Exception as e:
-        # Column doesn't exist, add it
-        if hasattr(cursor, 'execute'):
-            # PostgreSQL
-            cursor.execute('ALTER TABLE users ADD COLUMN profile_picture VARCHAR(255)')
-            cursor.execute('UPDATE users SET profile_picture = %s WHERE user_id = %s', (filename, current_user_id))
-        else:
-            # SQLite
-            cursor.execute('ALTER TABLE users ADD COLUMN profile_picture VARCHAR(255)')
-            cursor.execute('UPDATE users SET profile_picture = ? WHERE user_id = ?', (filename, current_user_id))
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('UPDATE users SET profile_picture = %s WHERE user_id = %s', (filename, current_user_id))
+    else:
+        # SQLite
+        cursor.execute('UPDATE users SET profile_picture = ? WHERE user_id = ?', (filename, current_user_id))
     
+    bump_data_version(cursor, current_user_id)
     conn.commit()
     conn.close()
     
@@ -762,12 +1100,13 @@ def upload_profile_picture(current_user_id):
 # Get profile picture
 @app.route('/api/user/profile-picture', methods=['GET'])
 @token_required
+@conditional_get
 def get_profile_picture(current_user_id):
     conn = get_db()
     cursor = conn.cursor()
     
     try:
-        if hasattr(cursor, 'execute'):
+        if is_postgres(cursor):
             # PostgreSQL
             cursor.execute('SELECT profile_picture FROM users WHERE user_id = %s', (current_user_id,))
         else:
@@ -788,30 +1127,15 @@ def get_profile_picture(current_user_id):
 # Get user goals
 @app.route('/api/user/goals', methods=['GET'])
 @token_required
+@conditional_get
 def get_user_goals(current_user_id):
     conn = get_db()
     cursor = conn.cursor()
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT * FROM user_goals 
-            WHERE user_id = %s AND is_active = 1
-            ORDER BY goal_id DESC LIMIT 1
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT * FROM user_goals 
-            WHERE user_id = ? AND is_active = 1
-            ORDER BY goal_id DESC LIMIT 1
-        ''', (current_user_id,))
-    
-    goal = cursor.fetchone()
+    goal = get_active_goal(cursor, current_user_id)
     conn.close()
     
     if goal:
-        return jsonify({'goal': dict(goal)}), 200
+        return jsonify({'goal': goal}), 200
     return jsonify({'goal': None}), 200
 
 # Set/Update user goals
@@ -829,20 +1153,20 @@ def set_user_goals(current_user_id):
     cursor = conn.cursor()
     
     # Deactivate old goals
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
-        cursor.execute('UPDATE user_goals SET is_active = 0 WHERE user_id = %s', (current_user_id,))
+        cursor.execute('UPDATE user_goals SET is_active = FALSE WHERE user_id = %s', (current_user_id,))
     else:
         # SQLite
-        cursor.execute('UPDATE user_goals SET is_active = 0 WHERE user_id = ?', (current_user_id,))
+        cursor.execute('UPDATE user_goals SET is_active = FALSE WHERE user_id = ?', (current_user_id,))
     
     # Create new goal
-    if hasattr(cursor, 'execute'):
+    if is_postgres(cursor):
         # PostgreSQL
         cursor.execute('''
             INSERT INTO user_goals 
             (user_id, goal_type, weekly_points_target, calorie_target, protein_target, start_date, is_active)
-            VALUES (%s, %s, %s, %s, %s, %s, 1)
+            VALUES (%s, %s, %s, %s, %s, %s, TRUE)
         ''', (current_user_id, goal_type, weekly_points_target, calorie_target, 
               protein_target, datetime.now().date()))
     else:
@@ -850,13 +1174,18 @@ def set_user_goals(current_user_id):
         cursor.execute('''
             INSERT INTO user_goals 
             (user_id, goal_type, weekly_points_target, calorie_target, protein_target, start_date, is_active)
-            VALUES (?, ?, ?, ?, ?, ?, 1)
+            VALUES (?, ?, ?, ?, ?, ?, TRUE)
         ''', (current_user_id, goal_type, weekly_points_target, calorie_target, 
               protein_target, datetime.now().date()))
     
+    bump_data_version(cursor, current_user_id)
     conn.commit()
     conn.close()
     
+    # Drop the cached goal so this worker reads the new one on the user's next request
+    if goal_cache is not None:
+        goal_cache.invalidate(current_user_id)
+    
     return jsonify({'message': 'Goals updated successfully'}), 200
 
 # Add this helper function for level calculation
@@ -884,315 +1213,232 @@ def calculate_user_level(total_points):
         'next_level_points': None
     }
 
-# Add achievement checking function
-def check_and_award_achievements(user_id):
-    """Check if user has earned any new achievements"""
-    conn = get_db()
-    cursor = conn.cursor()
+class DashboardLoader:
+    """Builds each dashboard section from one cursor.
+
+    The lifetime totals and active goal are read at most once and shared by
+    every section that needs them, so /api/dashboard/summary costs one
+    connection and no repeated queries.
+    """
+    
+    def __init__(self, cursor, user_id):
+        self.cursor = cursor
+        self.user_id = user_id
+        self.postgres = is_postgres(cursor)
+        self.today = datetime.now().date()
+        self._totals = None
+        self._goal = None
+        self._goal_loaded = False
+    
+    @property
+    def totals(self):
+        if self._totals is None:
+            self._totals = get_user_totals(self.cursor, self.user_id)
+        return self._totals
+    
+    @property
+    def goal(self):
+        if not self._goal_loaded:
+            self._goal = get_active_goal(self.cursor, self.user_id)
+            self._goal_loaded = True
+        return self._goal
+    
+    def day_param(self, day):
+        # psycopg2 adapts dates; SQLite stores days as ISO strings
+        return day if self.postgres else str(day)
+    
+    def progress(self):
+        week_start = self.today - timedelta(days=self.today.weekday())
+        
+        if self.postgres:
+            # PostgreSQL
+            self.cursor.execute('''
+                SELECT * FROM weekly_progress 
+                WHERE user_id = %s AND week_start_date = %s
+            ''', (self.user_id, self.day_param(week_start)))
+        else:
+            # SQLite
+            self.cursor.execute('''
+                SELECT * FROM weekly_progress 
+                WHERE user_id = ? AND week_start_date = ?
+            ''', (self.user_id, self.day_param(week_start)))
+        
+        progress = self.cursor.fetchone()
+        target = self.goal['weekly_points_target'] if self.goal else 100
+        
+        if not progress:
+            return {
+                'total_points': 0,
+                'meals_logged': 0,
+                'target': target,
+                'week_start': str(week_start)
+            }
+        
+        return {
+            'total_points': progress['total_points'],
+            'meals_logged': progress['meals_logged'],
+            'total_calories': progress['total_calories'],
+            'target': target,
+            'week_start': str(week_start)
+        }
     
-    # Get user's meal streak
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT COUNT(DISTINCT DATE(logged_at)) as streak_days
-            FROM food_logs
-            WHERE user_id = %s
-            AND DATE(logged_at) >= CURRENT_DATE - INTERVAL '7 days'
-        ''', (user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT COUNT(DISTINCT DATE(logged_at)) as streak_days
-            FROM food_logs
-            WHERE user_id = ?
-            AND DATE(logged_at) >= DATE('now', '-7 days')
-        ''', (user_id,))
+    def stats(self):
+        # Total lifetime points (meals plus achievements) and level
+        total_points = self.totals['meal_points'] + self.totals['achievement_points']
+        level_info = calculate_user_level(total_points)
+        
+        # Today's nutrition totals
+        if self.postgres:
+            # PostgreSQL
+            self.cursor.execute('''
+                SELECT 
+                    total_calories as today_calories,
+                    total_protein as today_protein,
+                    total_carbs as today_carbs,
+                    total_fat as today_fat
+                FROM daily_user_totals
+                WHERE user_id = %s AND day = %s
+            ''', (self.user_id, self.day_param(self.today)))
+        else:
+            # SQLite
+            self.cursor.execute('''
+                SELECT 
+                    total_calories as today_calories,
+                    total_protein as today_protein,
+                    total_carbs as today_carbs,
+                    total_fat as today_fat
+                FROM daily_user_totals
+                WHERE user_id = ? AND day = ?
+            ''', (self.user_id, self.day_param(self.today)))
+        
+        today_nutrition = self.cursor.fetchone() or {
+            'today_calories': 0, 'today_protein': 0, 'today_carbs': 0, 'today_fat': 0
+        }
+        
+        return {
+            'level': level_info,
+            'today_nutrition': {
+                'calories': today_nutrition['today_calories'],
+                'protein': today_nutrition['today_protein'],
+                'carbs': today_nutrition['today_carbs'],
+                'fat': today_nutrition['today_fat']
+            },
+            'goals': {
+                'calorie_target': self.goal['calorie_target'] if self.goal else 2000,
+                'protein_target': self.goal['protein_target'] if self.goal else 120
+            }
+        }
     
-    streak_result = cursor.fetchone()
-    streak_days = streak_result['streak_days'] if streak_result else 0
+    def points_history(self, days=7):
+        since = self.today - timedelta(days=days)
+        if self.postgres:
+            # PostgreSQL
+            self.cursor.execute('''
+                SELECT day, total_points
+                FROM daily_user_totals
+                WHERE user_id = %s AND day >= %s
+                ORDER BY day ASC
+            ''', (self.user_id, self.day_param(since)))
+        else:
+            # SQLite
+            self.cursor.execute('''
+                SELECT day, total_points
+                FROM daily_user_totals
+                WHERE user_id = ? AND day >= ?
+                ORDER BY day ASC
+            ''', (self.user_id, self.day_param(since)))
+        
+        return [{'date': str(row['day']), 'points': row['total_points']} for row in self.cursor.fetchall()]
     
-    # Get macro stats
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT 
-                SUM(protein) as total_protein,
-                SUM(carbs) as total_carbs,
-                SUM(fat) as total_fat,
-                COUNT(*) as total_meals
-            FROM food_logs
-            WHERE user_id = %s
-        ''', (user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT 
-                SUM(protein) as total_protein,
-                SUM(carbs) as total_carbs,
-                SUM(fat) as total_fat,
-                COUNT(*) as total_meals
-            FROM food_logs
-            WHERE user_id = ?
-        ''', (user_id,))
+    def macro_ratios(self):
+        # Lifetime macro totals
+        macros = self.totals
+        total = macros['total_protein'] + macros['total_carbs'] + macros['total_fat']
+        
+        if total == 0:
+            return {
+                'protein_percentage': 0,
+                'carbs_percentage': 0,
+                'fat_percentage': 0
+            }
+        
+        return {
+            'protein_percentage': round((macros['total_protein'] / total) * 100, 1),
+            'carbs_percentage': round((macros['total_carbs'] / total) * 100, 1),
+            'fat_percentage': round((macros['total_fat'] / total) * 100, 1)
+        }
     
-    macro_stats = cursor.fetchone()
-    
-    # Define achievements
-    achievements = []
-    
-    # Streak achievements
-    if streak_days >= 7:
-        achievements.append({
-            'id': 'streak_7',
-            'name': 'Week Warrior',
-            'description': '7-day logging streak',
-            'points': 50,
-            'icon': '🔥'
-        })
-    if streak_days >= 21:
-        achievements.append({
-            'id': 'streak_21',
-            'name': 'Consistency King',
-            'description': '21-day logging streak',
-            'points': 150,
-            'icon': '👑'
-        })
-    if streak_days >= 42:
-        achievements.append({
-            'id': 'streak_42',
-            'name': 'Habit Master',
-            'description': '42-day logging streak',
-            'points': 300,
-            'icon': '🏆'
-        })
-    
-    # Protein achievements
-    if macro_stats and macro_stats['total_protein']:
-        if macro_stats['total_protein'] > 500:
-            achievements.append({
-                'id': 'protein_500',
-                'name': 'Protein Rookie',
-                'description': '500g total protein logged',
-                'points': 30,
-                'icon': '💪'
-            })
-        if macro_stats['total_protein'] > 2000:
-            achievements.append({
-                'id': 'protein_2000',
-                'name': 'Protein Pro',
-                'description': '2000g total protein logged',
-                'points': 100,
-                'icon': '🥩'
-            })
-    
-    # Meal count achievements
-    if macro_stats and macro_stats['total_meals']:
-        if macro_stats['total_meals'] >= 10:
-            achievements.append({
-                'id': 'meals_10',
-                'name': 'Getting Started',
-                'description': '10 meals logged',
-                'points': 20,
-                'icon': '🍽️'
-            })
-        if macro_stats['total_meals'] >= 50:
-            achievements.append({
-                'id': 'meals_50',
-                'name': 'Dedicated Logger',
-                'description': '50 meals logged',
-                'points': 75,
-                'icon': '📊'
-            })
-        if macro_stats['total_meals'] >= 100:
-            achievements.append({
-                'id': 'meals_100',
-                'name': 'Century Club',
-                'description': '100 meals logged',
-                'points': 200,
-                'icon': '🎯'
-            })
-    
-    # Check which achievements are new
-    new_achievements = []
-    for achievement in achievements:
-        if hasattr(cursor, 'execute'):
+    def top_categories(self):
+        if self.postgres:
             # PostgreSQL
-            cursor.execute('''
-                SELECT * FROM user_achievements 
-                WHERE user_id = %s AND achievement_id = %s
-            ''', (user_id, achievement['id']))
+            self.cursor.execute('''
+                SELECT 
+                    food_name,
+                    COUNT(*) as count
+                FROM food_logs
+                WHERE user_id = %s
+                GROUP BY food_name
+                ORDER BY count DESC
+                LIMIT 5
+            ''', (self.user_id,))
         else:
             # SQLite
-            cursor.execute('''
-                SELECT * FROM user_achievements 
-                WHERE user_id = ? AND achievement_id = ?
-            ''', (user_id, achievement['id']))
+            self.cursor.execute('''
+                SELECT 
+                    food_name,
+                    COUNT(*) as count
+                FROM food_logs
+                WHERE user_id = ?
+                GROUP BY food_name
+                ORDER BY count DESC
+                LIMIT 5
+            ''', (self.user_id,))
         
-        if not cursor.fetchone():
-            # Award new achievement
-            if hasattr(cursor, 'execute'):
-                # PostgreSQL
-                cursor.execute('''
-                    INSERT INTO user_achievements (user_id, achievement_id, earned_at, points_awarded)
-                    VALUES (%s, %s, %s, %s)
-                ''', (user_id, achievement['id'], datetime.now(), achievement['points']))
-            else:
-                # SQLite
-                cursor.execute('''
-                    INSERT INTO user_achievements (user_id, achievement_id, earned_at, points_awarded)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, achievement['id'], datetime.now(), achievement['points']))
-            new_achievements.append(achievement)
-    
-    conn.commit()
-    conn.close()
+        return [{'name': row['food_name'].replace('_', ' ').title(), 'count': row['count']} 
+                for row in self.cursor.fetchall()]
     
-    return new_achievements
+    def achievements(self):
+        # Achievements are awarded as meals are logged, so this is a single read
+        if self.postgres:
+            # PostgreSQL
+            self.cursor.execute('''
+                SELECT * FROM user_achievements
+                WHERE user_id = %s
+                ORDER BY earned_at DESC
+            ''', (self.user_id,))
+        else:
+            # SQLite
+            self.cursor.execute('''
+                SELECT * FROM user_achievements
+                WHERE user_id = ?
+                ORDER BY earned_at DESC
+            ''', (self.user_id,))
+        
+        return [with_icon(dict(row)) for row in self.cursor.fetchall()]
+
+# Sections /api/dashboard/summary can return, in response order
+DASHBOARD_FIELDS = ['progress', 'stats', 'points_history', 'macro_ratios', 'top_categories', 'achievements']
 
 # New endpoint: Get dashboard stats
 @app.route('/api/dashboard/stats', methods=['GET'])
 @token_required
+@conditional_get
 def get_dashboard_stats(current_user_id):
     conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get total lifetime points
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(points_awarded), 0) as total_meal_points
-            FROM food_logs
-            WHERE user_id = %s
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(points_awarded), 0) as total_meal_points
-            FROM food_logs
-            WHERE user_id = ?
-        ''', (current_user_id,))
-    
-    meal_points = cursor.fetchone()['total_meal_points']
-    
-    # Get achievement points
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT COALESCE(SUM(points_awarded), 0) as total_achievement_points
-            FROM user_achievements
-            WHERE user_id = %s
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT COALESCE(SUM(points_awarded), 0) as total_achievement_points
-            FROM user_achievements
-            WHERE user_id = ?
-        ''', (current_user_id,))
-    
-    achievement_points = cursor.fetchone()['total_achievement_points']
-    
-    total_points = meal_points + achievement_points
-    
-    # Calculate level
-    level_info = calculate_user_level(total_points)
-    
-    # Get today's nutrition totals
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(calories), 0) as today_calories,
-                COALESCE(SUM(protein), 0) as today_protein,
-                COALESCE(SUM(carbs), 0) as today_carbs,
-                COALESCE(SUM(fat), 0) as today_fat
-            FROM food_logs
-            WHERE user_id = %s AND DATE(logged_at) = CURRENT_DATE
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(calories), 0) as today_calories,
-                COALESCE(SUM(protein), 0) as today_protein,
-                COALESCE(SUM(carbs), 0) as today_carbs,
-                COALESCE(SUM(fat), 0) as today_fat
-            FROM food_logs
-            WHERE user_id = ? AND DATE(logged_at) = DATE('now')
-        ''', (current_user_id,))
-    
-    today_nutrition = cursor.fetchone()
-    
-    # Get user's goals
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT calorie_target, protein_target 
-            FROM user_goals 
-            WHERE user_id = %s AND is_active = 1
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT calorie_target, protein_target 
-            FROM user_goals 
-            WHERE user_id = ? AND is_active = 1
-        ''', (current_user_id,))
-    
-    goals = cursor.fetchone()
+    stats = DashboardLoader(conn.cursor(), current_user_id).stats()
     conn.close()
     
-    return jsonify({
-        'level': level_info,
-        'today_nutrition': {
-            'calories': today_nutrition['today_calories'],
-            'protein': today_nutrition['today_protein'],
-            'carbs': today_nutrition['today_carbs'],
-            'fat': today_nutrition['today_fat']
-        },
-        'goals': {
-            'calorie_target': goals['calorie_target'] if goals else 2000,
-            'protein_target': goals['protein_target'] if goals else 120
-        }
-    }), 200
+    return jsonify(stats), 200
 
 # New endpoint: Get points history
 @app.route('/api/dashboard/points-history', methods=['GET'])
 @token_required
+@conditional_get
 def get_points_history(current_user_id):
     days = request.args.get('days', 7, type=int)  # 7, 15, or 30
     
     conn = get_db()
-    cursor = conn.cursor()
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT 
-                DATE(logged_at) as date,
-                SUM(points_awarded) as total_points
-            FROM food_logs
-            WHERE user_id = %s 
-            AND DATE(logged_at) >= CURRENT_DATE - INTERVAL %s DAYS
-            GROUP BY DATE(logged_at)
-            ORDER BY date ASC
-        ''', (current_user_id, days))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT 
-                DATE(logged_at) as date,
-                SUM(points_awarded) as total_points
-            FROM food_logs
-            WHERE user_id = ? 
-            AND DATE(logged_at) >= DATE('now', ? || ' days')
-            GROUP BY DATE(logged_at)
-            ORDER BY date ASC
-        ''', (current_user_id, -days))
-    
-    history = [{'date': row['date'], 'points': row['total_points']} for row in cursor.fetchall()]
+    history = DashboardLoader(conn.cursor(), current_user_id).points_history(days)
     conn.close()
     
     return jsonify({'points_history': history}), 200
@@ -1200,84 +1446,21 @@ def get_points_history(current_user_id):
 # New endpoint: Get macro ratios over time
 @app.route('/api/dashboard/macro-ratios', methods=['GET'])
 @token_required
+@conditional_get
 def get_macro_ratios(current_user_id):
     conn = get_db()
-    cursor = conn.cursor()
-    
-    # Get lifetime macro totals
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(protein), 0) as total_protein,
-                COALESCE(SUM(carbs), 0) as total_carbs,
-                COALESCE(SUM(fat), 0) as total_fat
-            FROM food_logs
-            WHERE user_id = %s
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT 
-                COALESCE(SUM(protein), 0) as total_protein,
-                COALESCE(SUM(carbs), 0) as total_carbs,
-                COALESCE(SUM(fat), 0) as total_fat
-            FROM food_logs
-            WHERE user_id = ?
-        ''', (current_user_id,))
-    
-    macros = cursor.fetchone()
+    ratios = DashboardLoader(conn.cursor(), current_user_id).macro_ratios()
     conn.close()
     
-    total = macros['total_protein'] + macros['total_carbs'] + macros['total_fat']
-    
-    if total == 0:
-        return jsonify({
-            'protein_percentage': 0,
-            'carbs_percentage': 0,
-            'fat_percentage': 0
-        }), 200
-    
-    return jsonify({
-        'protein_percentage': round((macros['total_protein'] / total) * 100, 1),
-        'carbs_percentage': round((macros['total_carbs'] / total) * 100, 1),
-        'fat_percentage': round((macros['total_fat'] / total) * 100, 1)
-    }), 200
+    return jsonify(ratios), 200
 
 # New endpoint: Get top food categories
 @app.route('/api/dashboard/top-categories', methods=['GET'])
 @token_required
+@conditional_get
 def get_top_categories(current_user_id):
     conn = get_db()
-    cursor = conn.cursor()
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT 
-                food_name,
-                COUNT(*) as count
-            FROM food_logs
-            WHERE user_id = %s
-            GROUP BY food_name
-            ORDER BY count DESC
-            LIMIT 5
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT 
-                food_name,
-                COUNT(*) as count
-            FROM food_logs
-            WHERE user_id = ?
-            GROUP BY food_name
-            ORDER BY count DESC
-            LIMIT 5
-        ''', (current_user_id,))
-    
-    categories = [{'name': row['food_name'].replace('_', ' ').title(), 'count': row['count']} 
-                  for row in cursor.fetchall()]
+    categories = DashboardLoader(conn.cursor(), current_user_id).top_categories()
     conn.close()
     
     return jsonify({'top_categories': categories}), 200
@@ -1285,46 +1468,78 @@ def get_top_categories(current_user_id):
 # New endpoint: Get user achievements
 @app.route('/api/user/achievements', methods=['GET'])
 @token_required
+@conditional_get
 def get_user_achievements(current_user_id):
-    # Check for new achievements first
-    new_achievements = check_and_award_achievements(current_user_id)
-    
     conn = get_db()
-    cursor = conn.cursor()
-    
-    if hasattr(cursor, 'execute'):
-        # PostgreSQL
-        cursor.execute('''
-            SELECT * FROM user_achievements
-            WHERE user_id = %s
-            ORDER BY earned_at DESC
-        ''', (current_user_id,))
-    else:
-        # SQLite
-        cursor.execute('''
-            SELECT * FROM user_achievements
-            WHERE user_id = ?
-            ORDER BY earned_at DESC
-        ''', (current_user_id,))
-    
-    achievements = [dict(row) for row in cursor.fetchall()]
+    achievements = DashboardLoader(conn.cursor(), current_user_id).achievements()
     conn.close()
     
     return jsonify({
         'achievements': achievements,
-        'new_achievements': new_achievements
+        'new_achievements': []  # Returned by /api/predict when a meal unlocks them
     }), 200
 
+# Whole dashboard in one request: ?fields=stats,points_history&days=30 (default: every section)
+@app.route('/api/dashboard/summary', methods=['GET'])
+@token_required
+@conditional_get
+def get_dashboard_summary(current_user_id):
+    fields = request.args.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else DASHBOARD_FIELDS
+    unknown = [f for f in fields if f not in DASHBOARD_FIELDS]
+    if unknown:
+        return jsonify({'message': f"Unknown fields: {', '.join(unknown)}",
+                        'available_fields': DASHBOARD_FIELDS}), 400
+    days = request.args.get('days', 7, type=int)
+    
+    conn = get_db()
+    loader = DashboardLoader(conn.cursor(), current_user_id)
+    summary = {}
+    for field in DASHBOARD_FIELDS:
+        if field in fields:
+            summary[field] = loader.points_history(days) if field == 'points_history' else getattr(loader, field)()
+    conn.close()
+    
+    return jsonify(summary), 200
+
 @app.route('/health', methods=['GET'])
 def health_check():
+    model_loaded = model is not None
+    ready = model_ready
+    if INFERENCE_MODE == 'remote':
+        try:
+            server_status = get_predictor().status()
+            model_loaded = server_status['model_loaded']
+            ready = server_status['model_ready']
+        except (InferenceUnavailable, RuntimeError):
+            model_loaded = ready = False
+    
     status = {
         'status': 'ok',
-        'model_loaded': model is not None,
-        'model_file_exists': os.path.exists('nutritional_analysis_model.h5'),
+        'model_loaded': model_loaded,
+        'model_ready': ready,
+        'model_file_exists': bool(MODEL_PATH) and os.path.exists(MODEL_PATH),
+        'inference_backend': INFERENCE_BACKEND,
+        'inference_mode': INFERENCE_MODE,
         'database_url_set': bool(os.environ.get('DATABASE_URL'))
     }
+    
+    # With eager loading, keep load balancers away until the model is warm
+    if PRELOAD_MODEL and not ready:
+        status['status'] = 'starting'
+        return jsonify(status), 503
     return jsonify(status), 200
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    snapshot = metrics.snapshot()
+    if INFERENCE_MODE == 'remote':
+        try:
+            snapshot['inference_server'] = get_predictor().metrics()
+        except (InferenceUnavailable, RuntimeError) as e:
+            snapshot['inference_server'] = {'error': str(e)}
+    return jsonify(snapshot), 200
+
 if __name__ == '__main__':
     import os
     
@@ -1334,4 +1549,7 @@ if __name__ == '__main__':
     # Check if we're in production or development
     debug_mode = os.environ.get('FLASK_ENV') != 'production'
     
+    if PRELOAD_MODEL and INFERENCE_MODE == 'local':
+        get_model()
+    
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""
+Microbenchmark: Keras Model.predict vs the compiled fixed-signature serving function.
+
+Usage:
+    python benchmark_inference.py [--iterations 50] [--xla]
+
+Prints p50/p99 latency in milliseconds for batch sizes 1-32.
+"""
+import argparse
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from model_backends import KERAS_MODEL_PATH, build_serving_module
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32]
+
+
+def measure(fn, batch, iterations, warmup=3):
+    for _ in range(warmup):
+        fn(batch)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prediction call paths')
+    parser.add_argument('--model', default=KERAS_MODEL_PATH)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--xla', action='store_true', help='Compile the serving function with XLA')
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    serve = build_serving_module(model, xla=args.xla).serve
+
+    paths = {
+        'model.predict': lambda batch: model.predict(batch, verbose=0),
+        'compiled' + (' (xla)' if args.xla else ''): lambda batch: serve(batch).numpy(),
+    }
+
+    print(f"{'batch':>5}  {'path':<16} {'p50 ms':>9} {'p99 ms':>9} {'p50 ms/img':>11}")
+    print('-' * 56)
+    rng = np.random.default_rng(0)
+    for batch_size in BATCH_SIZES:
+        batch = rng.uniform(-1, 1, (batch_size, 224, 224, 3)).astype(np.float32)
+        for name, fn in paths.items():
+            p50, p99 = measure(fn, batch, args.iterations)
+            print(f"{batch_size:>5}  {name:<16} {p50:>9.2f} {p99:>9.2f} {p50 / batch_size:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
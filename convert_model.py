@@ -0,0 +1,129 @@
+"""
+Build TFLite artifacts from the Keras model saved by the training notebook.
+
+Usage:
+    python convert_model.py --images path/to/food-101/images --min-agreement 0.97
+
+Writes nutritional_analysis_model_fp16.tflite and nutritional_analysis_model_int8.tflite
+and reports how often each one agrees with the Keras model's top-1 prediction.
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+import tensorflow as tf
+
+from model_backends import TFLITE_MODEL_PATHS, TFLiteBackend
+from preprocessing import decode_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+
+def find_keras_model():
+    """Prefer the native .keras file, fall back to the legacy .h5"""
+    for path in ('nutritional_analysis_model.keras', 'nutritional_analysis_model.h5'):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def list_images(images_dir, limit, seed=42):
+    """Pick a random sample of image files from a (Food-101 style) directory tree"""
+    paths = []
+    for root, _, files in os.walk(images_dir):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    random.Random(seed).shuffle(paths)
+    return paths[:limit]
+
+
+def load_image(path):
+    """Same preprocessing as the /api/predict endpoint"""
+    with open(path, 'rb') as f:
+        img = decode_image(f.read())
+    return tf.keras.applications.mobilenet_v2.preprocess_input(np.array(img, dtype=np.float32))
+
+
+def convert(model, quantization, calibration_images):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == 'fp16':
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        # Full integer quantization calibrated on real images; input/output stay float32
+        def representative_dataset():
+            for img in calibration_images:
+                yield [img[np.newaxis, ...]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+    return converter.convert()
+
+
+def top1_agreement(model, backend, images, batch_size=16):
+    agree = 0
+    for start in range(0, len(images), batch_size):
+        batch = np.stack(images[start:start + batch_size])
+        expected = np.argmax(model.predict(batch, verbose=0), axis=1)
+        actual = np.argmax(backend.predict(batch), axis=1)
+        agree += int(np.sum(expected == actual))
+    return agree / len(images)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the Keras food model to TFLite')
+    parser.add_argument('--model', default=find_keras_model(), help='Keras .keras/.h5 model to convert')
+    parser.add_argument('--images', help='Directory of sample food images for calibration and agreement')
+    parser.add_argument('--num-calibration', type=int, default=200)
+    parser.add_argument('--num-eval', type=int, default=500)
+    parser.add_argument('--types', nargs='+', choices=['fp16', 'int8'], default=['fp16', 'int8'])
+    parser.add_argument('--min-agreement', type=float, default=0.0,
+                        help='Reject (delete) a converted model whose top-1 agreement is below this')
+    args = parser.parse_args()
+
+    if not args.model or not os.path.exists(args.model):
+        print("❌ Keras model not found. Pass --model path/to/nutritional_analysis_model.keras")
+        return 1
+
+    print(f"Loading Keras model from {args.model}...")
+    model = tf.keras.models.load_model(args.model)
+
+    if args.images:
+        paths = list_images(args.images, args.num_calibration + args.num_eval)
+        images = [load_image(path) for path in paths]
+        calibration_images = images[:args.num_calibration]
+        eval_images = images[args.num_calibration:] or calibration_images
+    else:
+        print("⚠️ No --images given, calibrating and evaluating on random noise (agreement is not meaningful)")
+        rng = np.random.default_rng(0)
+        calibration_images = list(rng.uniform(-1, 1, (32, 224, 224, 3)).astype(np.float32))
+        eval_images = calibration_images
+
+    failed = False
+    for quantization in args.types:
+        output_path = TFLITE_MODEL_PATHS[f'tflite_{quantization}']
+        print(f"Converting to {quantization}...")
+        with open(output_path, 'wb') as f:
+            f.write(convert(model, quantization, calibration_images))
+
+        backend = TFLiteBackend(f'tflite_{quantization}', output_path)
+        agreement = top1_agreement(model, backend, eval_images)
+        size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        print(f"✓ {output_path}: {size_mb:.1f} MB, top-1 agreement {agreement * 100:.2f}% "
+              f"on {len(eval_images)} images")
+
+        if agreement < args.min_agreement:
+            print(f"❌ Rejected {quantization} model (below {args.min_agreement * 100:.2f}%)")
+            os.remove(output_path)
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import threading
+
+import metrics
+from db import is_postgres
+
+# Read endpoints answer If-None-Match with 304 after a single version lookup
+ETAGS_ENABLED = os.environ.get('ETAGS_ENABLED', '1') == '1'
+
+_lock = threading.Lock()
+_requests = 0
+_not_modified = 0
+
+
+def get_data_version(cursor, user_id):
+    """The user's data version (0 for unknown users); one primary-key read"""
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('SELECT data_version FROM users WHERE user_id = %s', (user_id,))
+    else:
+        # SQLite
+        cursor.execute('SELECT data_version FROM users WHERE user_id = ?', (user_id,))
+    row = cursor.fetchone()
+    return row['data_version'] if row else 0
+
+
+def bump_data_version(cursor, user_id=None):
+    """Mark the user's data (or everyone's, with no user_id) as changed.
+
+    Call in the same transaction as the write, so a reader can never see the
+    new version with the old data.
+    """
+    if user_id is None:
+        cursor.execute('UPDATE users SET data_version = data_version + 1')
+    elif is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('UPDATE users SET data_version = data_version + 1 WHERE user_id = %s', (user_id,))
+    else:
+        # SQLite
+        cursor.execute('UPDATE users SET data_version = data_version + 1 WHERE user_id = ?', (user_id,))
+
+
+def make_etag(user_id, version, path, day):
+    """ETag for one user's view of `path` (query string included) at `version` on `day`.
+
+    The day is part of it because several responses (weekly progress, points
+    history) change at midnight without any write.
+    """
+    key = f'{user_id}:{version}:{day}:{path}'.encode()
+    return hashlib.sha1(key).hexdigest()[:20]
+
+
+def record_conditional(not_modified):
+    """Count a conditional read and update the 304 hit ratio"""
+    global _requests, _not_modified
+    with _lock:
+        _requests += 1
+        if not_modified:
+            _not_modified += 1
+        ratio = round(_not_modified / _requests, 4)
+    metrics.inc('etag_not_modified' if not_modified else 'etag_modified')
+    metrics.set_gauge('etag_hit_ratio', ratio)
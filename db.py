@@ -0,0 +1,242 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+import metrics
+
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'nutrition_app.db')
+
+# PostgreSQL pool settings (per gunicorn worker)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT_SECONDS', 10))
+DB_POOL_MAX_LIFETIME = float(os.environ.get('DB_POOL_MAX_LIFETIME_SECONDS', 1800))
+DB_POOL_HEALTH_CHECK_AFTER = float(os.environ.get('DB_POOL_HEALTH_CHECK_AFTER_SECONDS', 30))
+
+# Tuned pragmas for the persistent SQLite connections
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA mmap_size = 134217728',
+]
+
+
+class PoolTimeout(Exception):
+    """No database connection became available in time"""
+
+
+def is_postgres(cursor_or_conn):
+    """True for psycopg2 cursors/connections (and pooled wrappers around them)"""
+    raw = getattr(cursor_or_conn, 'raw', cursor_or_conn)
+    return isinstance(raw, (psycopg2.extensions.cursor, psycopg2.extensions.connection))
+
+
+class PooledConnection:
+    """Connection handed out by get_db(); close() gives it back instead of closing it"""
+
+    def __init__(self, raw, release):
+        self.raw = raw
+        self._release = release
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return self.raw.cursor(*args, **kwargs)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._release(self.raw)
+
+
+class PostgresPool:
+    """Thread-safe PostgreSQL connection pool with health checks and a max connection lifetime"""
+
+    def __init__(self, dsn, max_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 max_lifetime=DB_POOL_MAX_LIFETIME, health_check_after=DB_POOL_HEALTH_CHECK_AFTER):
+        self.dsn = dsn
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.idle = deque()
+        self.created_at = {}
+        self.open_count = 0
+        self.condition = threading.Condition()
+
+    def _connect(self):
+        raw = psycopg2.connect(self.dsn, cursor_factory=RealDictCursor)
+        self.created_at[id(raw)] = time.monotonic()
+        metrics.inc('db_pool_connections_created')
+        return raw
+
+    def _discard(self, raw):
+        self.created_at.pop(id(raw), None)
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def _healthy(self, raw, idle_since):
+        now = time.monotonic()
+        if raw.closed or now - self.created_at.get(id(raw), now) > self.max_lifetime:
+            return False
+        if now - idle_since > self.health_check_after:
+            try:
+                with raw.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                raw.rollback()
+            except psycopg2.Error:
+                metrics.inc('db_pool_health_check_failures')
+                return False
+        return True
+
+    def get(self):
+        start = time.perf_counter()
+        while True:
+            with self.condition:
+                while True:
+                    if self.idle:
+                        raw, idle_since = self.idle.pop()
+                        break
+
+                    if self.open_count < self.max_size:
+                        self.open_count += 1
+                        raw = None
+                        break
+
+                    remaining = self.timeout - (time.perf_counter() - start)
+                    if remaining <= 0:
+                        metrics.inc('db_pool_timeouts')
+                        raise PoolTimeout(f'No database connection available after {self.timeout}s')
+                    self.condition.wait(remaining)
+
+            if raw is None:
+                break
+
+            # Health-check outside the lock, so a slow SELECT 1 doesn't hold up other threads
+            if self._healthy(raw, idle_since):
+                with self.condition:
+                    self._checked_out(start)
+                return PooledConnection(raw, self.put)
+            self._discard(raw)
+            with self.condition:
+                self.open_count -= 1
+                self.condition.notify()
+
+        # Open new connections outside the lock
+        try:
+            raw = self._connect()
+        except Exception:
+            with self.condition:
+                self.open_count -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self._checked_out(start)
+        return PooledConnection(raw, self.put)
+
+    def _checked_out(self, start):
+        metrics.inc('db_pool_checkouts')
+        metrics.observe('db_pool_wait_ms', (time.perf_counter() - start) * 1000)
+        metrics.set_gauge('db_pool_in_use', self.open_count - len(self.idle))
+        metrics.set_gauge('db_pool_idle', len(self.idle))
+
+    def put(self, raw):
+        # End any transaction the caller left open before reusing the connection
+        reusable = not raw.closed
+        if reusable:
+            try:
+                raw.rollback()
+            except psycopg2.Error:
+                reusable = False
+
+        with self.condition:
+            if reusable:
+                self.idle.append((raw, time.monotonic()))
+            else:
+                self._discard(raw)
+                self.open_count -= 1
+            metrics.set_gauge('db_pool_in_use', self.open_count - len(self.idle))
+            metrics.set_gauge('db_pool_idle', len(self.idle))
+            self.condition.notify()
+
+
+class SQLiteConnections:
+    """One persistent, tuned SQLite connection per thread"""
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.local = threading.local()
+
+    def get(self):
+        raw = getattr(self.local, 'conn', None)
+        if raw is None:
+            raw = sqlite3.connect(self.path)
+            raw.row_factory = sqlite3.Row
+            for pragma in SQLITE_PRAGMAS:
+                raw.execute(pragma)
+            self.local.conn = raw
+            self.local.checkouts = 0
+            metrics.inc('db_sqlite_connections_created')
+        # Nested get_db() calls on one thread share the connection
+        self.local.checkouts += 1
+        metrics.inc('db_pool_checkouts')
+        return PooledConnection(raw, self.put)
+
+    def put(self, raw):
+        # Once the last holder is done, drop anything left uncommitted; the connection stays open
+        self.local.checkouts -= 1
+        if self.local.checkouts == 0 and raw.in_transaction:
+            raw.rollback()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Create the pool lazily, once per process (connections must not cross fork)"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                database_url = os.environ.get('DATABASE_URL')
+                _pool = PostgresPool(database_url) if database_url else SQLiteConnections()
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def get_connection():
+    return get_pool().get()
+
+
+@contextmanager
+def unit_of_work():
+    """Run a block of statements on one connection as a single transaction.
+
+    Yields a cursor; commits once if the block finishes, rolls back if it raises.
+    Write paths pass the cursor to helpers like log_meals() so all of their
+    statements share one round-trip sequence and one commit.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
@@ -0,0 +1,158 @@
+"""Streaming export of a user's meal history as NDJSON or CSV.
+
+Rows are read in chunks (a server-side cursor on PostgreSQL, fetchmany on
+SQLite) and written out as they arrive, so a worker's memory use doesn't
+grow with the size of the history.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+import metrics
+from db import get_connection, is_postgres
+from meal_history import filter_clauses
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 500))
+EXPORT_GZIP = os.environ.get('EXPORT_GZIP', '1') == '1'
+
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Extra data ?include= can add: weekly_progress columns are joined onto each
+# log row; achievements follow the logs as their own records (NDJSON only)
+EXPORT_INCLUDES = ['weekly_progress', 'achievements']
+WEEKLY_COLUMNS = [('week_start_date', 'week_start_date'), ('total_points', 'week_total_points'),
+                  ('meals_logged', 'week_meals_logged'), ('goal_achieved', 'week_goal_achieved')]
+ACHIEVEMENT_COLUMNS = ['achievement_key', 'achievement_name', 'achievement_description',
+                       'points_awarded', 'earned_at']
+
+
+def _plain(value):
+    """JSON/CSV friendly form of a database value"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _log_query(cursor, user_id, fields, filters, include):
+    """Oldest first, so the export reads like a diary and walks the (user_id, logged_at, log_id) index"""
+    columns = [f'food_logs.{field}' for field in fields]
+    join = ''
+    if 'weekly_progress' in include:
+        if is_postgres(cursor):
+            # PostgreSQL: weeks start on Monday, like update_weekly_progress()
+            week_start = "date_trunc('week', food_logs.logged_at)::date"
+        else:
+            # SQLite
+            week_start = "date(food_logs.logged_at, 'weekday 0', '-6 days')"
+        join = f'''
+            LEFT JOIN weekly_progress ON weekly_progress.user_id = food_logs.user_id
+                AND weekly_progress.week_start_date = {week_start}
+        '''
+        columns += [f'weekly_progress.{column} AS {alias}' for column, alias in WEEKLY_COLUMNS]
+
+    where, params = filter_clauses(cursor, user_id, filters)
+    sql = f'''
+        SELECT {', '.join(columns)} FROM food_logs
+        {join}
+        WHERE {' AND '.join(where)}
+        ORDER BY food_logs.logged_at, food_logs.log_id
+    '''
+    return sql, params
+
+
+def _achievement_query(cursor, user_id):
+    mark = '%s' if is_postgres(cursor) else '?'
+    return f'''
+        SELECT {', '.join(ACHIEVEMENT_COLUMNS)} FROM user_achievements
+        WHERE user_id = {mark}
+        ORDER BY earned_at, achievement_id
+    ''', [user_id]
+
+
+def _chunks(conn, sql, params):
+    """Yield lists of rows, at most EXPORT_CHUNK_SIZE at a time"""
+    if is_postgres(conn):
+        # PostgreSQL: a named (server-side) cursor only ships itersize rows per round trip
+        cursor = conn.cursor(name=f'export_{uuid.uuid4().hex}')
+        cursor.itersize = EXPORT_CHUNK_SIZE
+    else:
+        # SQLite
+        cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def export_columns(fields, include):
+    """Column names of the log records, in output order"""
+    columns = list(fields)
+    if 'weekly_progress' in include:
+        columns += [alias for _, alias in WEEKLY_COLUMNS]
+    return columns
+
+
+def stream_export(user_id, fmt, fields, filters, include):
+    """Generate the export body as text chunks.
+
+    Opens its own connection because the body is produced after the view
+    has returned; the connection goes back to the pool when the generator
+    finishes or the client disconnects.
+    """
+    columns = export_columns(fields, include)
+    conn = get_connection()
+    rows_written = 0
+    try:
+        probe = conn.cursor()
+        sql, params = _log_query(probe, user_id, fields, filters, include)
+        achievements = _achievement_query(probe, user_id) if 'achievements' in include else None
+        probe.close()
+
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in _chunks(conn, sql, params):
+                writer.writerows([_plain(row[column]) for column in columns] for row in rows)
+                rows_written += len(rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if rows_written == 0:
+                yield buffer.getvalue()
+        else:
+            record_type = {'type': 'log'} if achievements else {}
+            for rows in _chunks(conn, sql, params):
+                rows_written += len(rows)
+                yield ''.join(json.dumps({**record_type, **{column: _plain(row[column]) for column in columns}}) + '\n'
+                              for row in rows)
+            if achievements:
+                for rows in _chunks(conn, *achievements):
+                    yield ''.join(json.dumps({'type': 'achievement',
+                                              **{column: _plain(row[column]) for column in ACHIEVEMENT_COLUMNS}}) + '\n'
+                                  for row in rows)
+    finally:
+        conn.close()
+        metrics.inc('export_rows', rows_written)
+
+
+def gzip_stream(chunks, level=6):
+    """Compress a stream of text chunks into one gzip member as it is produced"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -906,7 +906,7 @@ const HistoryPage = ({ token, onViewMeal }) => {
                         {meal.image_path ? (
                           <>
                             <img 
-                              src={`http://localhost:5000/uploads/${meal.image_path}`}
+                              src={`http://localhost:5000/uploads/${meal.image_path}?size=200`}
                               alt={meal.food_name}
                               className="w-full h-full object-cover"
                               onError={(e) => {
@@ -1005,7 +1005,7 @@ const MealDetailsPage = ({ meal }) => {
                 {meal.image_path ? (
                   <>
                     <img 
-                      src={`http://localhost:5000/uploads/${meal.image_path}`}
+                      src={`http://localhost:5000/uploads/${meal.image_path}?size=480`}
                       alt={meal.food_name}
                       className="w-full h-full object-cover"
                       onError={(e) => {
@@ -1262,7 +1262,7 @@ const ProfilePage = ({ token, username }) => {
       if (response.ok) {
         const data = await response.json();
         if (data.profile_picture) {
-          setImagePreview(`http://localhost:5000/uploads/${data.profile_picture}`);
+          setImagePreview(`http://localhost:5000/uploads/${data.profile_picture}?size=200`);
         }
       }
     } catch (error) {
@@ -1290,7 +1290,7 @@ const ProfilePage = ({ token, username }) => {
         
         if (response.ok) {
           const data = await response.json();
-          setImagePreview(`http://localhost:5000/uploads/${data.filename}`);
+          setImagePreview(`http://localhost:5000/uploads/${data.filename}?size=200`);
           alert('Profile picture updated!');
         }
       } catch (error) {
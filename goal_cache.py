@@ -0,0 +1,79 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+GOAL_CACHE_ENABLED = os.environ.get('GOAL_CACHE_ENABLED', '1') == '1'
+GOAL_CACHE_MAX_ENTRIES = int(os.environ.get('GOAL_CACHE_MAX_ENTRIES', 10000))
+# Other gunicorn workers only see a goal change once their entry expires, so keep this short
+GOAL_CACHE_TTL_SECONDS = float(os.environ.get('GOAL_CACHE_TTL_SECONDS', 30))
+
+# Marks users known to have no active goal, so they are cached too
+NO_GOAL = object()
+
+
+class GoalCache:
+    """Per-worker LRU/TTL cache of each user's active user_goals row.
+
+    set_user_goals calls invalidate() after its commit, so the worker that
+    handled the change reads the new goal on the user's next request; other
+    workers pick it up within the TTL. invalidate() also bumps the user's
+    generation number, so a reader that missed before the write cannot put
+    back the stale row it read.
+    """
+
+    def __init__(self, max_entries=GOAL_CACHE_MAX_ENTRIES, ttl=GOAL_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, user_id):
+        """Return (found, goal, generation); pass generation back to fill() after a miss"""
+        with self.lock:
+            entry = self.entries.get(user_id)
+            generation = self.generations.get(user_id, 0)
+            if entry is not None:
+                goal, stored_at = entry
+                if time.monotonic() - stored_at <= self.ttl:
+                    self.entries.move_to_end(user_id)
+                    self._record(hit=True)
+                    return True, (None if goal is NO_GOAL else goal), generation
+                del self.entries[user_id]
+            self._record(hit=False)
+            return False, None, generation
+
+    def fill(self, user_id, goal, generation):
+        """Store a row read from the database, unless the goal was written since the miss"""
+        with self.lock:
+            if self.generations.get(user_id, 0) != generation:
+                return
+            self._store(user_id, goal)
+
+    def invalidate(self, user_id):
+        """Forget the user's goal after a committed change"""
+        with self.lock:
+            self.generations[user_id] = self.generations.get(user_id, 0) + 1
+            self.entries.pop(user_id, None)
+            metrics.set_gauge('goal_cache_entries', len(self.entries))
+
+    def _store(self, user_id, goal):
+        self.entries[user_id] = (NO_GOAL if goal is None else goal, time.monotonic())
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            metrics.inc('goal_cache_evictions')
+        metrics.set_gauge('goal_cache_entries', len(self.entries))
+
+    def _record(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        metrics.inc('goal_cache_hits' if hit else 'goal_cache_misses')
+        metrics.set_gauge('goal_cache_hit_ratio', round(self.hits / (self.hits + self.misses), 4))
@@ -0,0 +1,42 @@
+# Gunicorn picks this file up automatically from the working directory.
+#
+# PRELOAD_MODEL=1 imports the app in the master before forking, so workers share
+# its pages copy-on-write, and has each worker load and warm the model before it
+# starts accepting requests. No backend is loaded in the master: TensorFlow and
+# the TFLite interpreter's thread pools don't survive fork(), and the model
+# file's pages are shared through the page cache anyway.
+import os
+import time
+
+import metrics
+
+preload_app = os.environ.get('PRELOAD_MODEL', '0') == '1'
+
+worker_started_at = None
+
+
+def on_starting(server):
+    # Migrate once in the master so workers only find an up-to-date schema. A failure only
+    # warns, as it does when api.py migrates on import, so the app starts the same either way
+    if os.environ.get('AUTO_MIGRATE', '1') == '1':
+        from migrations import run_migrations
+        try:
+            run_migrations()
+        except Exception as e:
+            server.log.warning(f"Database migration warning: {e}")
+
+
+def post_fork(server, worker):
+    global worker_started_at
+    worker_started_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    import api
+
+    if api.PRELOAD_MODEL and api.INFERENCE_MODE == 'local':
+        api.get_model()
+
+    memory = metrics.get_memory_usage()
+    worker.log.info(f"Worker {worker.pid} ready in {time.perf_counter() - worker_started_at:.1f}s "
+                    f"(RSS {memory['rss_mb']} MB, PSS {memory.get('pss_mb', '?')} MB)")
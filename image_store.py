@@ -0,0 +1,198 @@
+import atexit
+import hashlib
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import metrics
+
+IMAGE_WRITE_QUEUE_SIZE = int(os.environ.get('IMAGE_WRITE_QUEUE_SIZE', 64))
+# Uploads are kept at full size, so also cap the bytes held in memory while they wait
+IMAGE_WRITE_QUEUE_MAX_BYTES = int(os.environ.get('IMAGE_WRITE_QUEUE_MAX_BYTES', 32 * 1024 * 1024))
+# How long a request waits for room in a full queue before writing the file itself
+IMAGE_WRITE_QUEUE_TIMEOUT = float(os.environ.get('IMAGE_WRITE_QUEUE_TIMEOUT_SECONDS', 2))
+IMAGE_WRITE_FSYNC = os.environ.get('IMAGE_WRITE_FSYNC', '1') == '1'
+# Failed writes are retried with exponential backoff, starting at this delay, until storage recovers
+IMAGE_WRITE_RETRY_SECONDS = float(os.environ.get('IMAGE_WRITE_RETRY_SECONDS', 0.5))
+IMAGE_WRITE_RETRY_MAX_SECONDS = float(os.environ.get('IMAGE_WRITE_RETRY_MAX_SECONDS', 30))
+
+# Leading bytes of the formats Pillow decodes for us
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF8', 'gif'),
+    (b'BM', 'bmp'),
+]
+
+
+def image_extension(data):
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    return 'img'
+
+
+def content_path(data):
+    """Storage path for an upload: its SHA-256, sharded two levels deep (ab/cd/abcd....jpg)"""
+    digest = hashlib.sha256(data).hexdigest()
+    return f'{digest[:2]}/{digest[2:4]}/{digest}.{image_extension(data)}'
+
+
+def write_atomic(full_path, data, fsync=IMAGE_WRITE_FSYNC):
+    """Write to a temporary name and rename, so readers never see a partial file"""
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, full_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ImageWriter:
+    """Write-behind storage for uploaded images, keyed by content hash.
+
+    store() names the file after the SHA-256 of the original bytes and hands
+    the bytes to a background thread, which saves them to `storage` (see
+    storage.py), so the request doesn't wait for the disk or the bucket.
+    Identical photos map to one file and are only written once. The
+    queue is bounded: when the disk falls behind, store() blocks for up to
+    IMAGE_WRITE_QUEUE_TIMEOUT and then writes the file itself, which slows
+    uploads down instead of growing memory. It also writes the file itself
+    when queuing it would hold more than max_bytes of uploads in memory.
+    Files still in the queue are
+    served from memory by pending(); a failed write keeps its file there and
+    is retried with backoff, so a storage outage doesn't lose photos. After
+    each write the thread calls on_write(path, data), e.g. to render
+    thumbnails; writes store() has to do itself skip it, so the request
+    isn't slowed down further.
+    """
+
+    def __init__(self, storage, max_queue=IMAGE_WRITE_QUEUE_SIZE, on_write=None,
+                 max_bytes=IMAGE_WRITE_QUEUE_MAX_BYTES):
+        self.storage = storage
+        self.max_queue = max_queue
+        self.max_bytes = max_bytes
+        self.on_write = on_write
+        self._queue = None
+        self._pending = {}
+        self._pending_bytes = 0
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _start(self):
+        # The writer thread doesn't survive fork, so each worker process starts its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self.max_queue)
+                    self._pending = {}
+                    self._pending_bytes = 0
+                    threading.Thread(target=self._run, name='image-writer', daemon=True).start()
+                    atexit.register(self.flush)
+                    self._pid = os.getpid()
+
+    def store(self, data):
+        """Queue the upload for writing and return its storage path (relative to root)"""
+        self._start()
+        path = content_path(data)
+        with self._lock:
+            duplicate = path in self._pending
+            if not duplicate:
+                over_budget = self._pending_bytes + len(data) > self.max_bytes
+                self._pending[path] = data
+                self._pending_bytes += len(data)
+                metrics.set_gauge('image_store_pending_bytes', self._pending_bytes)
+        if duplicate:
+            metrics.inc('image_store_dedup_hits')
+            return path
+
+        if over_budget:
+            metrics.inc('image_store_backpressure')
+            self._write_now(path)
+            return path
+
+        try:
+            self._queue.put_nowait(path)
+        except queue.Full:
+            metrics.inc('image_store_backpressure')
+            try:
+                self._queue.put(path, timeout=IMAGE_WRITE_QUEUE_TIMEOUT)
+            except queue.Full:
+                self._write_now(path)
+        metrics.set_gauge('image_store_queue_depth', self._queue.qsize())
+        return path
+
+    def _write_now(self, path):
+        """Write on the request thread, when the queue has no room for the file"""
+        metrics.inc('image_store_sync_writes')
+        if not self._write(path, post_write=False):
+            # Hand it to the writer thread to retry, without holding up the request for room in the queue
+            threading.Thread(target=self._queue.put, args=(path,), name='image-requeue', daemon=True).start()
+
+    def pending(self, path):
+        """Bytes of a file that is queued but not yet on disk (None otherwise)"""
+        with self._lock:
+            return self._pending.get(path)
+
+    def flush(self, timeout=30):
+        """Wait for queued writes to reach the disk (called at exit)"""
+        deadline = time.monotonic() + timeout
+        while self._queue is not None and self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def _write(self, path, post_write=True):
+        """Save a pending file; returns False, leaving it pending, if storage fails"""
+        with self._lock:
+            data = self._pending.get(path)
+        if data is None:
+            return True
+        try:
+            # Already stored by an earlier upload of the same photo
+            written = not self.storage.exists(path)
+            if written:
+                with metrics.timer('image_store_write_ms'):
+                    self.storage.save(path, data, fsync=IMAGE_WRITE_FSYNC)
+                metrics.inc('image_store_writes')
+            else:
+                metrics.inc('image_store_dedup_hits')
+        except Exception as e:
+            metrics.inc('image_store_write_errors')
+            print(f"⚠️ Could not store image {path}: {e}")
+            return False
+        with self._lock:
+            if self._pending.pop(path, None) is not None:
+                self._pending_bytes -= len(data)
+            metrics.set_gauge('image_store_pending_bytes', self._pending_bytes)
+
+        if written and post_write and self.on_write is not None:
+            try:
+                self.on_write(path, data)
+            except Exception as e:
+                print(f"⚠️ Post-write step failed for {path}: {e}")
+        return True
+
+    def _run(self):
+        delay = IMAGE_WRITE_RETRY_SECONDS
+        while True:
+            path = self._queue.get()
+            try:
+                # Later files would most likely fail too, so keep retrying this one until storage is back
+                while not self._write(path):
+                    metrics.inc('image_store_write_retries')
+                    time.sleep(delay)
+                    delay = min(delay * 2, IMAGE_WRITE_RETRY_MAX_SECONDS)
+                delay = IMAGE_WRITE_RETRY_SECONDS
+            finally:
+                self._queue.task_done()
+                metrics.set_gauge('image_store_queue_depth', self._queue.qsize())
@@ -0,0 +1,132 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+import metrics
+from inference_client import InferenceUnavailable
+from preprocessing import MODEL_INPUT_SHAPE, preprocess_into
+
+# Batching configuration (override with environment variables)
+MAX_BATCH_SIZE = int(os.environ.get('INFERENCE_MAX_BATCH_SIZE', 16))
+MAX_WAIT_MS = float(os.environ.get('INFERENCE_MAX_WAIT_MS', 5))
+REQUEST_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT_SECONDS', 30))
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+
+
+class BatchScheduler:
+    """Collect concurrent prediction requests and run them as one batched forward pass.
+
+    Callers submit a single 224x224x3 image, either raw uint8 pixels or already
+    scaled float32. A background thread waits for the first request, then keeps
+    collecting until either max_batch_size requests are queued or max_wait_ms
+    has passed. It scales each image straight into its row of a preallocated
+    input buffer and calls predict_fn once. Each caller gets its own row of
+    the output.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        # Reused for every batch; only the batching thread touches it
+        self._buffer = np.empty((self.max_batch_size,) + MODEL_INPUT_SHAPE, dtype=np.float32)
+        self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """Queue one image and return a Future for its prediction vector"""
+        future = Future()
+        self._queue.put((image, future, time.perf_counter()))
+        metrics.set_gauge('inference_queue_depth', self._queue.qsize())
+        return future
+
+    def predict(self, image, timeout=REQUEST_TIMEOUT):
+        """Submit one image and block until its prediction vector is ready"""
+        return self._result(self.submit(image), timeout)
+
+    def predict_many(self, images, timeout=REQUEST_TIMEOUT):
+        """Prediction vectors for several images, in order.
+
+        They are all queued before waiting, so the batching thread picks them
+        up together: one forward pass for up to max_batch_size images.
+        """
+        futures = [self.submit(image) for image in images]
+        deadline = time.perf_counter() + timeout
+        return [self._result(future, deadline - time.perf_counter()) for future in futures]
+
+    def _result(self, future, timeout):
+        """The future's prediction; raises InferenceUnavailable (a 503) if it takes longer than timeout"""
+        try:
+            return future.result(timeout=max(0.0, timeout))
+        except FutureTimeout:
+            # Still queued: the batching thread will skip it
+            future.cancel()
+            metrics.inc('inference_timeouts')
+            raise InferenceUnavailable('Timed out waiting for a prediction')
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the batch is full or the wait expires"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            metrics.set_gauge('inference_queue_depth', self._queue.qsize())
+
+            # Skip requests whose caller already gave up
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # A bad image fails only its own request
+            accepted = []
+            for item in batch:
+                try:
+                    preprocess_into(item[0], self._buffer[len(accepted)])
+                except Exception as e:
+                    metrics.inc('inference_input_errors')
+                    item[1].set_exception(e)
+                    continue
+                accepted.append(item)
+            batch = accepted
+            if not batch:
+                continue
+
+            images = self._buffer[:len(batch)]
+            metrics.observe('inference_batch_size', len(batch), BATCH_SIZE_BUCKETS)
+
+            try:
+                with metrics.timer('inference_batch_latency_ms'):
+                    predictions = np.asarray(self.predict_fn(images))
+            except Exception as e:
+                metrics.inc('inference_batch_errors')
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            now = time.perf_counter()
+            for row, (_, future, enqueued_at) in zip(predictions, batch):
+                metrics.observe('inference_request_latency_ms', (now - enqueued_at) * 1000)
+                future.set_result(row)
+
+            metrics.inc('inference_batches')
+            metrics.inc('inference_requests', len(batch))
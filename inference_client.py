@@ -0,0 +1,118 @@
+import json
+import os
+import socket
+import struct
+import threading
+
+import numpy as np
+
+# Unix socket shared by the web workers and the inference server
+INFERENCE_SOCKET = os.environ.get('INFERENCE_SOCKET', '/tmp/nutrivision-inference.sock')
+REQUEST_TIMEOUT = float(os.environ.get('INFERENCE_TIMEOUT_SECONDS', 30))
+
+# Every message is a 1-byte kind plus a 4-byte payload length, followed by the payload.
+# Requests:  u = uint8 224x224x3 image, f = preprocessed float32 image,
+#            b = several uint8 images back to back, p = status ping, m = metrics snapshot
+# Responses: o = ok, e = error message
+HEADER = struct.Struct('!cI')
+IMAGE_SHAPE = (224, 224, 3)
+
+
+class InferenceUnavailable(Exception):
+    """No prediction could be served: the inference server is unreachable or inference timed out"""
+
+
+def recv_exact(conn, size):
+    """Read exactly size bytes, or return None if the peer closed the connection"""
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = conn.recv_into(view[received:], size - received)
+        if n == 0:
+            return None
+        received += n
+    return bytes(buf)
+
+
+def send_message(conn, kind, payload=b''):
+    conn.sendall(HEADER.pack(kind, len(payload)) + payload)
+
+
+def recv_message(conn):
+    header = recv_exact(conn, HEADER.size)
+    if header is None:
+        return None, None
+    kind, length = HEADER.unpack(header)
+    payload = recv_exact(conn, length) if length else b''
+    if payload is None:
+        return None, None
+    return kind, payload
+
+
+class InferenceClient:
+    """Send preprocessed images to the inference server; one persistent connection per thread"""
+
+    def __init__(self, socket_path=INFERENCE_SOCKET, timeout=REQUEST_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            try:
+                conn.connect(self.socket_path)
+            except OSError as e:
+                conn.close()
+                raise InferenceUnavailable(f"Inference server not reachable at {self.socket_path}: {e}")
+            self._local.conn = conn
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _request(self, kind, payload=b''):
+        # Retry once on a fresh connection in case the server restarted
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                send_message(conn, kind, payload)
+                reply_kind, reply = recv_message(conn)
+                if reply_kind is None:
+                    raise ConnectionError('Inference server closed the connection')
+                break
+            except OSError as e:
+                self._close()
+                if attempt == 1:
+                    raise InferenceUnavailable(str(e))
+
+        if reply_kind == b'e':
+            raise RuntimeError(reply.decode())
+        return reply
+
+    def predict(self, image):
+        """Return the prediction vector for one 224x224x3 image (uint8 pixels or preprocessed float32)"""
+        if image.dtype == np.uint8:
+            # Raw pixels are a quarter of the size; the server scales them into its batch buffer
+            reply = self._request(b'u', np.ascontiguousarray(image).tobytes())
+        else:
+            reply = self._request(b'f', np.ascontiguousarray(image, dtype=np.float32).tobytes())
+        return np.frombuffer(reply, dtype=np.float32)
+
+    def predict_many(self, images):
+        """Prediction vectors for several 224x224x3 uint8 images, from one request"""
+        payload = b''.join(np.ascontiguousarray(image, dtype=np.uint8).tobytes() for image in images)
+        reply = self._request(b'b', payload)
+        return list(np.frombuffer(reply, dtype=np.float32).reshape(len(images), -1))
+
+    def status(self):
+        return json.loads(self._request(b'p'))
+
+    def metrics(self):
+        return json.loads(self._request(b'm'))
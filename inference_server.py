@@ -0,0 +1,121 @@
+"""
+Dedicated inference server that owns the model, so web workers don't have to.
+
+Usage:
+    python inference_server.py [--workers 2] [--socket /tmp/nutrivision-inference.sock]
+    INFERENCE_MODE=remote gunicorn api:app --workers 4 --threads 4
+
+The parent binds the Unix socket and forks the worker processes, which share
+it and each load their own model copy after the fork. Each worker batches
+the requests it accepts with BatchScheduler.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+
+import numpy as np
+
+import metrics
+from inference import BatchScheduler
+from inference_client import IMAGE_SHAPE, INFERENCE_SOCKET, recv_message, send_message
+from model_backends import load_backend, warm_up
+
+
+def handle_connection(conn, scheduler, backend):
+    """Serve requests from one web-worker connection until it closes"""
+    with conn:
+        while True:
+            try:
+                kind, payload = recv_message(conn)
+            except OSError:
+                return
+            if kind is None:
+                return
+
+            try:
+                if kind in (b'u', b'f'):
+                    dtype = np.uint8 if kind == b'u' else np.float32
+                    image = np.frombuffer(payload, dtype=dtype).reshape(IMAGE_SHAPE)
+                    reply = np.asarray(scheduler.predict(image), dtype=np.float32).tobytes()
+                elif kind == b'b':
+                    images = np.frombuffer(payload, dtype=np.uint8).reshape((-1,) + IMAGE_SHAPE)
+                    reply = np.asarray(scheduler.predict_many(images), dtype=np.float32).tobytes()
+                elif kind == b'p':
+                    reply = json.dumps({'pid': os.getpid(), 'backend': backend.name,
+                                        'model_loaded': True, 'model_ready': True}).encode()
+                elif kind == b'm':
+                    reply = json.dumps(metrics.snapshot()).encode()
+                else:
+                    raise ValueError(f'Unknown request kind {kind!r}')
+                send_message(conn, b'o', reply)
+            except OSError:
+                return
+            except Exception as e:
+                send_message(conn, b'e', str(e).encode())
+
+
+def run_worker(listener):
+    """Load the model and accept connections on the shared listening socket"""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    start = time.perf_counter()
+    backend = load_backend()
+    warm_up(backend, int(os.environ.get('WARMUP_INFERENCES', 2)))
+    scheduler = BatchScheduler(backend.predict)
+    memory = metrics.get_memory_usage()
+    print(f"✅ Inference worker {os.getpid()} ready ({backend.name}) in {time.perf_counter() - start:.1f}s, "
+          f"RSS {memory['rss_mb']} MB")
+
+    while True:
+        conn, _ = listener.accept()
+        threading.Thread(target=handle_connection, args=(conn, scheduler, backend), daemon=True).start()
+
+
+def serve(socket_path=INFERENCE_SOCKET, workers=1):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(128)
+    print(f"Inference server listening on {socket_path} with {workers} worker(s)")
+
+    # Fork before loading TensorFlow; each worker loads its own model
+    ctx = multiprocessing.get_context('fork')
+    processes = []
+
+    def shutdown(signum, frame):
+        for process in processes:
+            process.terminate()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(workers):
+        process = ctx.Process(target=run_worker, args=(listener,), daemon=True)
+        process.start()
+        processes.append(process)
+
+    # Restart workers that die
+    while True:
+        time.sleep(1)
+        for i, process in enumerate(processes):
+            if not process.is_alive():
+                print(f"⚠️ Inference worker {process.pid} exited ({process.exitcode}), restarting")
+                processes[i] = ctx.Process(target=run_worker, args=(listener,), daemon=True)
+                processes[i].start()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='NutriVision inference server')
+    parser.add_argument('--socket', default=INFERENCE_SOCKET)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('INFERENCE_WORKERS', 1)))
+    args = parser.parse_args()
+    serve(args.socket, args.workers)
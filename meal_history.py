@@ -0,0 +1,131 @@
+"""Keyset-paginated reads of a user's food_logs.
+
+Pages are ordered newest first on (logged_at, log_id) and continue from an
+opaque cursor holding the last row's key, so every page is one index range
+scan however far back the user scrolls. Each filter has a matching
+(user_id, <filter>, logged_at, log_id) index (migration 009).
+"""
+import base64
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from db import is_postgres
+
+LOGS_DEFAULT_PAGE_SIZE = int(os.environ.get('LOGS_DEFAULT_PAGE_SIZE', 10))
+LOGS_MAX_PAGE_SIZE = int(os.environ.get('LOGS_MAX_PAGE_SIZE', 100))
+
+# Columns a client may ask for with ?fields=
+LOG_FIELDS = ['log_id', 'food_name', 'confidence_score', 'image_path', 'meal_type', 'calories',
+              'protein', 'carbs', 'fat', 'points_awarded', 'notes', 'logged_at']
+
+
+class InvalidQuery(ValueError):
+    """A malformed cursor, filter or field list (reported to the client as a 400)"""
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just past `row`"""
+    logged_at = row['logged_at']
+    if isinstance(logged_at, datetime):
+        # Keep microseconds, or rows within the same second would be skipped
+        logged_at = logged_at.isoformat(sep=' ')
+    key = json.dumps([logged_at, row['log_id']]).encode()
+    return base64.urlsafe_b64encode(key).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        logged_at, log_id = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return str(logged_at), int(log_id)
+    except (ValueError, TypeError):
+        raise InvalidQuery('Invalid cursor')
+
+
+def parse_fields(value):
+    """Requested columns (all of LOG_FIELDS when not given), in LOG_FIELDS order"""
+    if not value:
+        return list(LOG_FIELDS)
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in LOG_FIELDS]
+    if unknown:
+        raise InvalidQuery(f"Unknown fields: {', '.join(unknown)}")
+    return [f for f in LOG_FIELDS if f in fields]
+
+
+def _parse_date(value, name):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise InvalidQuery(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def parse_filters(args):
+    """Filters from the query string: from/to dates (inclusive), meal_type and food_name"""
+    filters = {}
+    if args.get('from'):
+        filters['from'] = _parse_date(args['from'], 'from')
+    if args.get('to'):
+        filters['to'] = _parse_date(args['to'], 'to')
+    if args.get('meal_type'):
+        filters['meal_type'] = args['meal_type'].strip().lower()
+    if args.get('food_name'):
+        # Logs store the model's class name, e.g. "apple_pie"
+        filters['food_name'] = args['food_name'].strip().lower().replace(' ', '_')
+    return filters
+
+
+def filter_clauses(cursor, user_id, filters, table='food_logs'):
+    """WHERE conditions and parameters selecting one user's logs that match `filters`"""
+    postgres = is_postgres(cursor)
+    mark = '%s' if postgres else '?'
+    day = (lambda d: d) if postgres else str
+
+    where = [f'{table}.user_id = {mark}']
+    params = [user_id]
+    if 'from' in filters:
+        where.append(f'{table}.logged_at >= {mark}')
+        params.append(day(filters['from']))
+    if 'to' in filters:
+        where.append(f'{table}.logged_at < {mark}')
+        params.append(day(filters['to'] + timedelta(days=1)))
+    for column in ('meal_type', 'food_name'):
+        if column in filters:
+            where.append(f'{table}.{column} = {mark}')
+            params.append(filters[column])
+    return where, params
+
+
+def build_log_query(cursor, user_id, fields, filters, after=None, limit=None):
+    """SELECT for a user's logs, newest first, optionally continuing after a decoded cursor"""
+    mark = '%s' if is_postgres(cursor) else '?'
+
+    # The sort key is always read so the next cursor can be built from the last row
+    columns = list(fields) + [c for c in ('logged_at', 'log_id') if c not in fields]
+    where, params = filter_clauses(cursor, user_id, filters)
+    if after is not None:
+        where.append(f'(logged_at, log_id) < ({mark}, {mark})')
+        params.extend(after)
+
+    sql = f'''
+        SELECT {', '.join(columns)} FROM food_logs
+        WHERE {' AND '.join(where)}
+        ORDER BY logged_at DESC, log_id DESC
+    '''
+    if limit is not None:
+        sql += f' LIMIT {mark}'
+        params.append(limit)
+    return sql, params
+
+
+def fetch_log_page(cursor, user_id, fields, filters, after=None, limit=LOGS_DEFAULT_PAGE_SIZE):
+    """One page of logs and the cursor for the next page (None on the last page)"""
+    limit = max(1, min(limit, LOGS_MAX_PAGE_SIZE))
+    # One extra row tells us whether another page exists
+    sql, params = build_log_query(cursor, user_id, fields, filters, after, limit + 1)
+    cursor.execute(sql, params)
+    rows = [dict(row) for row in cursor.fetchall()]
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    logs = [{field: row[field] for field in fields} for row in rows[:limit]]
+    return logs, next_cursor
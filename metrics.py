@@ -0,0 +1,99 @@
+import resource
+import threading
+import time
+
+# Default histogram buckets (upper bounds). Latencies are recorded in milliseconds.
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+
+
+def inc(name, value=1):
+    """Increment a counter"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name, value):
+    """Set a gauge to its current value"""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name, value, buckets=None):
+    """Record a value in a histogram"""
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            bounds = list(buckets or LATENCY_BUCKETS_MS)
+            hist = {'buckets': bounds, 'counts': [0] * (len(bounds) + 1), 'count': 0, 'sum': 0.0}
+            _histograms[name] = hist
+
+        for i, bound in enumerate(hist['buckets']):
+            if value <= bound:
+                hist['counts'][i] += 1
+                break
+        else:
+            hist['counts'][-1] += 1
+
+        hist['count'] += 1
+        hist['sum'] += value
+
+
+class timer:
+    """Context manager that records elapsed milliseconds into a histogram"""
+
+    def __init__(self, name, buckets=None):
+        self.name = name
+        self.buckets = buckets
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed_ms = (time.perf_counter() - self.start) * 1000
+        observe(self.name, self.elapsed_ms, self.buckets)
+        return False
+
+
+def snapshot():
+    """Return a JSON-serializable copy of all metrics"""
+    with _lock:
+        histograms = {}
+        for name, hist in _histograms.items():
+            labels = [f'le_{bound}' for bound in hist['buckets']] + ['le_inf']
+            histograms[name] = {
+                'buckets': dict(zip(labels, hist['counts'])),
+                'count': hist['count'],
+                'sum': round(hist['sum'], 3),
+                'mean': round(hist['sum'] / hist['count'], 3) if hist['count'] else 0
+            }
+        return {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+            'histograms': histograms
+        }
+
+
+def get_memory_usage():
+    """Return this process's resident (RSS) and proportional (PSS) memory in MB"""
+    usage = {}
+    for path, fields in (('/proc/self/status', {'VmRSS:': 'rss_mb'}),
+                         ('/proc/self/smaps_rollup', {'Pss:': 'pss_mb'})):
+        try:
+            with open(path) as f:
+                for line in f:
+                    parts = line.split()
+                    if parts and parts[0] in fields:
+                        usage[fields[parts[0]]] = round(int(parts[1]) / 1024, 1)
+        except OSError:
+            pass
+
+    if 'rss_mb' not in usage:
+        # Peak RSS (KB on Linux) when /proc is not available
+        usage['rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return usage
@@ -0,0 +1,576 @@
+"""
+Versioned schema migrations for SQLite (development) and PostgreSQL (production).
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py status     # list applied and pending versions
+
+api.py also applies pending migrations at startup (AUTO_MIGRATE=0 turns that off).
+Applied versions are recorded in schema_migrations. Each migration runs in its
+own transaction, except ones marked non-transactional (CREATE INDEX CONCURRENTLY
+on PostgreSQL), which run in autocommit mode and must be safe to re-run.
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from db import SQLITE_PATH
+from rollup import LIFETIME_TOTALS_QUERY, rebuild_daily_totals, rebuild_user_totals
+
+# Key for the PostgreSQL advisory lock that stops two processes migrating at once
+MIGRATION_LOCK_ID = 724113
+MIGRATION_LOCK_TIMEOUT = float(os.environ.get('MIGRATION_LOCK_TIMEOUT_SECONDS', 300))
+
+MIGRATIONS = []
+
+
+def migration(version, name, transactional=True):
+    """Register a migration function taking (cursor, postgres)"""
+    def register(fn):
+        MIGRATIONS.append((version, name, transactional, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return register
+
+
+def column_names(cursor, postgres, table):
+    if postgres:
+        # PostgreSQL
+        cursor.execute('''
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s
+        ''', (table,))
+        return {row['column_name'] for row in cursor.fetchall()}
+    else:
+        # SQLite
+        cursor.execute(f'PRAGMA table_info({table})')
+        return {row['name'] for row in cursor.fetchall()}
+
+
+def add_missing_columns(cursor, postgres, table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, type) the table doesn't have yet"""
+    existing = column_names(cursor, postgres, table)
+    for name, column_type in columns:
+        if name not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}')
+            print(f"  added {table}.{name}")
+
+
+def create_index(cursor, postgres, name, table, columns, unique=False):
+    index = 'UNIQUE INDEX' if unique else 'INDEX'
+    if postgres:
+        # PostgreSQL: build without blocking writes. A failed concurrent build leaves an
+        # INVALID index behind that IF NOT EXISTS would skip, so drop it and retry.
+        cursor.execute('''
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND NOT i.indisvalid
+        ''', (name,))
+        if cursor.fetchone():
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+        cursor.execute(f'CREATE {index} CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})')
+    else:
+        # SQLite
+        cursor.execute(f'CREATE {index} IF NOT EXISTS {name} ON {table} ({columns})')
+
+
+def drop_index(cursor, postgres, name):
+    if postgres:
+        # PostgreSQL
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    else:
+        # SQLite
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+@migration(1, 'base schema')
+def create_base_schema(cursor, postgres):
+    """Every table the app uses, as the union of database.py and init_db.py's definitions"""
+    if postgres:
+        # PostgreSQL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id SERIAL PRIMARY KEY,
+                username VARCHAR(50) UNIQUE NOT NULL,
+                email VARCHAR(100) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                profile_picture VARCHAR(255),
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_login TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS food_nutrition (
+                food_id SERIAL PRIMARY KEY,
+                food_name VARCHAR(100) UNIQUE NOT NULL,
+                calories INTEGER NOT NULL,
+                protein DECIMAL(8,2) NOT NULL,
+                carbs DECIMAL(8,2) NOT NULL,
+                fat DECIMAL(8,2) NOT NULL,
+                serving_size VARCHAR(50),
+                health_score INTEGER NOT NULL DEFAULT 50,
+                category VARCHAR(50)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_goals (
+                goal_id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                goal_type VARCHAR(50) NOT NULL DEFAULT 'maintain',
+                weekly_points_target INTEGER DEFAULT 100,
+                calorie_target INTEGER DEFAULT 2000,
+                protein_target INTEGER DEFAULT 120,
+                carbs_target DECIMAL(8,2),
+                fat_target DECIMAL(8,2),
+                goal_description TEXT,
+                start_date DATE NOT NULL,
+                end_date DATE,
+                is_active BOOLEAN DEFAULT TRUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS food_logs (
+                log_id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                food_name VARCHAR(100) NOT NULL,
+                confidence_score DECIMAL(5,4) NOT NULL,
+                image_path VARCHAR(255) NOT NULL,
+                meal_type VARCHAR(20) NOT NULL,
+                calories INTEGER NOT NULL,
+                protein DECIMAL(8,2) NOT NULL,
+                carbs DECIMAL(8,2) NOT NULL,
+                fat DECIMAL(8,2) NOT NULL,
+                points_awarded INTEGER NOT NULL,
+                notes TEXT,
+                logged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weekly_progress (
+                progress_id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                week_start_date DATE NOT NULL,
+                week_end_date DATE NOT NULL,
+                total_points INTEGER DEFAULT 0,
+                meals_logged INTEGER DEFAULT 0,
+                total_calories INTEGER DEFAULT 0,
+                total_protein DECIMAL(10,2) DEFAULT 0,
+                total_carbs DECIMAL(10,2) DEFAULT 0,
+                total_fat DECIMAL(10,2) DEFAULT 0,
+                goal_achieved BOOLEAN DEFAULT FALSE,
+                UNIQUE(user_id, week_start_date)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_achievements (
+                achievement_id SERIAL PRIMARY KEY,
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                achievement_key VARCHAR(50) NOT NULL,
+                achievement_name VARCHAR(100) NOT NULL,
+                achievement_description TEXT,
+                earned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                points_awarded INTEGER DEFAULT 0
+            )
+        ''')
+    else:
+        # SQLite
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username VARCHAR(50) UNIQUE NOT NULL,
+                email VARCHAR(100) UNIQUE NOT NULL,
+                password_hash VARCHAR(255) NOT NULL,
+                profile_picture VARCHAR(255),
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                last_login DATETIME
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS food_nutrition (
+                food_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                food_name VARCHAR(100) UNIQUE NOT NULL,
+                calories REAL NOT NULL,
+                protein REAL NOT NULL,
+                carbs REAL NOT NULL,
+                fat REAL NOT NULL,
+                serving_size VARCHAR(50),
+                health_score INTEGER DEFAULT 50,
+                category VARCHAR(50)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_goals (
+                goal_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                goal_type VARCHAR(50) NOT NULL DEFAULT 'maintain',
+                weekly_points_target INTEGER DEFAULT 100,
+                calorie_target INTEGER DEFAULT 2000,
+                protein_target REAL DEFAULT 120,
+                carbs_target REAL,
+                fat_target REAL,
+                goal_description TEXT,
+                start_date DATE NOT NULL,
+                end_date DATE,
+                is_active BOOLEAN DEFAULT TRUE,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS food_logs (
+                log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                food_name VARCHAR(100) NOT NULL,
+                confidence_score REAL,
+                image_path VARCHAR(255),
+                meal_type VARCHAR(20),
+                logged_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                calories REAL,
+                protein REAL,
+                carbs REAL,
+                fat REAL,
+                points_awarded INTEGER,
+                notes TEXT,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weekly_progress (
+                progress_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                week_start_date DATE NOT NULL,
+                week_end_date DATE NOT NULL,
+                total_points INTEGER DEFAULT 0,
+                meals_logged INTEGER DEFAULT 0,
+                total_calories REAL DEFAULT 0,
+                total_protein REAL DEFAULT 0,
+                total_carbs REAL DEFAULT 0,
+                total_fat REAL DEFAULT 0,
+                goal_achieved BOOLEAN DEFAULT 0,
+                UNIQUE(user_id, week_start_date),
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_achievements (
+                achievement_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                achievement_key VARCHAR(50) NOT NULL,
+                achievement_name VARCHAR(100) NOT NULL,
+                achievement_description TEXT,
+                earned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                points_awarded INTEGER DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+
+
+@migration(2, 'reconcile columns')
+def reconcile_columns(cursor, postgres):
+    """Bring databases created by older copies of database.py / init_db.py up to the base schema"""
+    decimal = 'DECIMAL(8,2)' if postgres else 'REAL'
+    timestamp = 'TIMESTAMP' if postgres else 'DATETIME'
+
+    add_missing_columns(cursor, postgres, 'users', [('profile_picture', 'VARCHAR(255)')])
+    add_missing_columns(cursor, postgres, 'food_nutrition', [
+        ('serving_size', 'VARCHAR(50)'),
+        ('category', 'VARCHAR(50)'),
+    ])
+    # SQLite can't add a column with a non-constant default, so created_at stays NULL for old rows
+    add_missing_columns(cursor, postgres, 'user_goals', [
+        ('goal_type', "VARCHAR(50) DEFAULT 'maintain'"),
+        ('goal_description', 'TEXT'),
+        ('carbs_target', decimal),
+        ('fat_target', decimal),
+        ('end_date', 'DATE'),
+        ('created_at', timestamp),
+    ])
+    add_missing_columns(cursor, postgres, 'food_logs', [('notes', 'TEXT')])
+    add_missing_columns(cursor, postgres, 'weekly_progress', [
+        ('goal_achieved', 'BOOLEAN DEFAULT FALSE' if postgres else 'BOOLEAN DEFAULT 0'),
+    ])
+
+    # database.py keyed user_achievements by the achievement's text id (e.g. 'streak_7').
+    # Rebuild it with a numeric id and that text moved to achievement_key.
+    columns = column_names(cursor, postgres, 'user_achievements')
+    if 'achievement_key' not in columns:
+        cursor.execute('ALTER TABLE user_achievements RENAME TO user_achievements_old')
+        create_base_schema(cursor, postgres)
+        cursor.execute('''
+            INSERT INTO user_achievements (user_id, achievement_key, achievement_name, earned_at, points_awarded)
+            SELECT user_id, achievement_id, achievement_id, earned_at, points_awarded
+            FROM user_achievements_old
+        ''')
+        cursor.execute('DROP TABLE user_achievements_old')
+        print("  rebuilt user_achievements with achievement_key")
+
+
+@migration(3, 'dashboard indexes', transactional=False)
+def create_dashboard_indexes(cursor, postgres):
+    """Indexes for the per-user filters every dashboard query uses"""
+    create_index(cursor, postgres, 'idx_food_logs_user_logged_at', 'food_logs', 'user_id, logged_at')
+    create_index(cursor, postgres, 'idx_user_goals_user_active', 'user_goals', 'user_id, is_active')
+    create_index(cursor, postgres, 'idx_user_achievements_user', 'user_achievements', 'user_id')
+
+
+@migration(4, 'daily user totals')
+def create_daily_user_totals(cursor, postgres):
+    """Per-user, per-day rollup of food_logs for the dashboard, backfilled from existing logs"""
+    if postgres:
+        # PostgreSQL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_user_totals (
+                user_id INTEGER REFERENCES users(user_id) ON DELETE CASCADE,
+                day DATE NOT NULL,
+                meals_logged INTEGER NOT NULL DEFAULT 0,
+                total_points INTEGER NOT NULL DEFAULT 0,
+                total_calories INTEGER NOT NULL DEFAULT 0,
+                total_protein DECIMAL(12,2) NOT NULL DEFAULT 0,
+                total_carbs DECIMAL(12,2) NOT NULL DEFAULT 0,
+                total_fat DECIMAL(12,2) NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            )
+        ''')
+    else:
+        # SQLite
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_user_totals (
+                user_id INTEGER NOT NULL,
+                day DATE NOT NULL,
+                meals_logged INTEGER NOT NULL DEFAULT 0,
+                total_points INTEGER NOT NULL DEFAULT 0,
+                total_calories REAL NOT NULL DEFAULT 0,
+                total_protein REAL NOT NULL DEFAULT 0,
+                total_carbs REAL NOT NULL DEFAULT 0,
+                total_fat REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day),
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+    rebuild_daily_totals(cursor)
+
+
+@migration(5, 'user totals')
+def create_user_totals(cursor, postgres):
+    """Lifetime sums per user for the dashboard, macro ratios and achievements, backfilled"""
+    if postgres:
+        # PostgreSQL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_totals (
+                user_id INTEGER PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+                meals_logged INTEGER NOT NULL DEFAULT 0,
+                meal_points INTEGER NOT NULL DEFAULT 0,
+                achievement_points INTEGER NOT NULL DEFAULT 0,
+                total_calories BIGINT NOT NULL DEFAULT 0,
+                total_protein DECIMAL(14,2) NOT NULL DEFAULT 0,
+                total_carbs DECIMAL(14,2) NOT NULL DEFAULT 0,
+                total_fat DECIMAL(14,2) NOT NULL DEFAULT 0
+            )
+        ''')
+    else:
+        # SQLite
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_totals (
+                user_id INTEGER PRIMARY KEY,
+                meals_logged INTEGER NOT NULL DEFAULT 0,
+                meal_points INTEGER NOT NULL DEFAULT 0,
+                achievement_points INTEGER NOT NULL DEFAULT 0,
+                total_calories REAL NOT NULL DEFAULT 0,
+                total_protein REAL NOT NULL DEFAULT 0,
+                total_carbs REAL NOT NULL DEFAULT 0,
+                total_fat REAL NOT NULL DEFAULT 0,
+                FOREIGN KEY (user_id) REFERENCES users (user_id) ON DELETE CASCADE
+            )
+        ''')
+    cursor.execute('''
+        INSERT INTO user_totals
+        (user_id, meals_logged, meal_points, achievement_points,
+         total_calories, total_protein, total_carbs, total_fat)
+        SELECT user_id, meals_logged, meal_points, achievement_points,
+               total_calories, total_protein, total_carbs, total_fat
+        FROM (''' + LIFETIME_TOTALS_QUERY + ''') totals
+    ''')
+
+
+@migration(6, 'streak state')
+def add_streak_state(cursor, postgres):
+    """Streak columns for the achievements engine; drops duplicate awards ahead of the unique index"""
+    add_missing_columns(cursor, postgres, 'user_totals', [
+        ('current_streak', 'INTEGER NOT NULL DEFAULT 0'),
+        ('longest_streak', 'INTEGER NOT NULL DEFAULT 0'),
+        ('last_log_day', 'DATE'),
+    ])
+    cursor.execute('''
+        DELETE FROM user_achievements
+        WHERE EXISTS (
+            SELECT 1 FROM user_achievements earlier
+            WHERE earlier.user_id = user_achievements.user_id
+            AND earlier.achievement_key = user_achievements.achievement_key
+            AND earlier.achievement_id < user_achievements.achievement_id
+        )
+    ''')
+    rebuild_user_totals(cursor)
+
+
+@migration(7, 'unique achievements', transactional=False)
+def create_unique_achievements_index(cursor, postgres):
+    """One award per user and achievement, so concurrent meal logs can't award twice"""
+    create_index(cursor, postgres, 'idx_user_achievements_user_key', 'user_achievements',
+                 'user_id, achievement_key', unique=True)
+
+
+@migration(8, 'data version')
+def add_data_version(cursor, postgres):
+    """Per-user counter bumped by every write, used for ETags on read endpoints"""
+    add_missing_columns(cursor, postgres, 'users', [('data_version', 'INTEGER NOT NULL DEFAULT 0')])
+
+
+@migration(9, 'meal history indexes', transactional=False)
+def create_meal_history_indexes(cursor, postgres):
+    """Keyset pagination indexes for /api/logs: one per filter, all ending in the sort key"""
+    create_index(cursor, postgres, 'idx_food_logs_user_logged_at_id', 'food_logs', 'user_id, logged_at, log_id')
+    create_index(cursor, postgres, 'idx_food_logs_user_meal_type', 'food_logs', 'user_id, meal_type, logged_at, log_id')
+    create_index(cursor, postgres, 'idx_food_logs_user_food_name', 'food_logs', 'user_id, food_name, logged_at, log_id')
+    # Superseded by idx_food_logs_user_logged_at_id
+    drop_index(cursor, postgres, 'idx_food_logs_user_logged_at')
+
+
+def connect():
+    """A dedicated connection (not from the pool) so autocommit can be switched freely"""
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url:
+        return psycopg2.connect(database_url, cursor_factory=RealDictCursor), True
+    conn = sqlite3.connect(SQLITE_PATH)
+    conn.row_factory = sqlite3.Row
+    # Transactions are managed explicitly below
+    conn.isolation_level = None
+    return conn, False
+
+
+def ensure_migrations_table(conn, postgres):
+    cursor = conn.cursor()
+    if postgres:
+        # PostgreSQL
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+    else:
+        # SQLite
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+
+def applied_versions(cursor):
+    cursor.execute('SELECT version FROM schema_migrations')
+    return {row['version'] for row in cursor.fetchall()}
+
+
+def acquire_lock(conn):
+    """PostgreSQL advisory lock, polled so no statement sits waiting while another process
+    builds indexes concurrently (which waits for every open transaction)"""
+    cursor = conn.cursor()
+    deadline = time.monotonic() + MIGRATION_LOCK_TIMEOUT
+    while True:
+        cursor.execute('SELECT pg_try_advisory_lock(%s) AS locked', (MIGRATION_LOCK_ID,))
+        if cursor.fetchone()['locked']:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError('Timed out waiting for another process to finish migrating')
+        time.sleep(0.5)
+
+
+def apply_migration(conn, postgres, version, name, transactional, fn):
+    cursor = conn.cursor()
+    if postgres:
+        # PostgreSQL: checked in autocommit mode; the advisory lock keeps it valid
+        if version in applied_versions(cursor):
+            return False
+        conn.autocommit = not transactional
+        fn(cursor, postgres)
+        cursor.execute('INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)',
+                       (version, name, datetime.now()))
+        if transactional:
+            conn.commit()
+        conn.autocommit = True
+    else:
+        # SQLite: BEGIN IMMEDIATE takes the write lock, so concurrent workers apply each version once
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            if version in applied_versions(cursor):
+                cursor.execute('ROLLBACK')
+                return False
+            fn(cursor, postgres)
+            cursor.execute('INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)',
+                           (version, name, datetime.now()))
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+    return True
+
+
+def run_migrations():
+    """Apply every pending migration in version order; returns the versions applied"""
+    conn, postgres = connect()
+    applied = []
+    try:
+        if postgres:
+            conn.autocommit = True
+            acquire_lock(conn)
+        ensure_migrations_table(conn, postgres)
+
+        for version, name, transactional, fn in MIGRATIONS:
+            try:
+                if apply_migration(conn, postgres, version, name, transactional, fn):
+                    print(f"✅ Applied migration {version:03d} {name}")
+                    applied.append(version)
+            except Exception:
+                if postgres and not conn.autocommit:
+                    conn.rollback()
+                print(f"❌ Migration {version:03d} {name} failed")
+                raise
+    finally:
+        conn.close()
+
+    if not applied:
+        print("Database schema is up to date")
+    return applied
+
+
+def migration_status():
+    """(version, name, applied) for every known migration"""
+    conn, postgres = connect()
+    try:
+        if postgres:
+            conn.autocommit = True
+        ensure_migrations_table(conn, postgres)
+        done = applied_versions(conn.cursor())
+    finally:
+        conn.close()
+    return [(version, name, version in done) for version, name, _, _ in MIGRATIONS]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='NutriVision database migrations')
+    parser.add_argument('command', nargs='?', default='migrate', choices=['migrate', 'status'])
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        for version, name, applied in migration_status():
+            print(f"{version:03d} {name:<30} {'applied' if applied else 'pending'}")
+    else:
+        run_migrations()
@@ -0,0 +1,233 @@
+import os
+import shutil
+import threading
+
+import numpy as np
+
+# Which backend serves predictions: keras, compiled, tflite_fp16 or tflite_int8
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+
+KERAS_MODEL_PATH = os.environ.get('MODEL_PATH', 'nutritional_analysis_model.h5')
+COMPILED_MODEL_DIR = os.environ.get('COMPILED_MODEL_DIR', 'nutritional_analysis_model_compiled')
+INFERENCE_XLA = os.environ.get('INFERENCE_XLA', '0') == '1'
+# Written into the compiled export: the stamp of the Keras file it was traced from
+COMPILED_SOURCE_FILE = 'source_model.txt'
+TFLITE_MODEL_PATHS = {
+    'tflite_fp16': os.environ.get('TFLITE_FP16_MODEL_PATH', 'nutritional_analysis_model_fp16.tflite'),
+    'tflite_int8': os.environ.get('TFLITE_INT8_MODEL_PATH', 'nutritional_analysis_model_int8.tflite'),
+}
+
+
+def get_tflite_interpreter_class():
+    """Prefer the standalone LiteRT/tflite runtimes, fall back to the one bundled with TensorFlow"""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class KerasBackend:
+    """Full Keras model loaded from the .h5/.keras file the notebook saves"""
+
+    name = 'keras'
+
+    def __init__(self, model_path=KERAS_MODEL_PATH):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.model = tf.keras.models.load_model(model_path)
+
+    def predict(self, batch):
+        return self.model.predict(batch, verbose=0)
+
+
+def build_serving_module(keras_model, xla=INFERENCE_XLA):
+    """Wrap a Keras model in a traced tf.function with a fixed float32 (None, 224, 224, 3) signature"""
+    import tensorflow as tf
+
+    module = tf.Module()
+    module.model = keras_model
+
+    @tf.function(input_signature=[tf.TensorSpec([None, 224, 224, 3], tf.float32, name='images')],
+                 jit_compile=xla)
+    def serve(images):
+        return module.model(images, training=False)
+
+    module.serve = serve
+    return module
+
+
+def file_stamp(path):
+    """'<mtime>:<size>' of a model file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+        return f"{int(stat.st_mtime)}:{stat.st_size}"
+    except (OSError, TypeError):
+        return None
+
+
+def compiled_source_stamp(export_dir=COMPILED_MODEL_DIR):
+    """Stamp of the Keras file a compiled export was traced from (None if missing or unstamped)"""
+    try:
+        with open(os.path.join(export_dir, COMPILED_SOURCE_FILE)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def save_compiled_model(keras_model, export_dir=COMPILED_MODEL_DIR, xla=INFERENCE_XLA, source_stamp=None):
+    """Trace the serving function once and persist it as a SavedModel, replacing a stale export"""
+    import tensorflow as tf
+
+    module = build_serving_module(keras_model, xla)
+
+    # Save under a temporary name and rename, so workers starting together don't clobber each other
+    tmp_dir = f"{export_dir}.tmp-{os.getpid()}"
+    tf.saved_model.save(module, tmp_dir, signatures={'serving_default': module.serve})
+    if source_stamp:
+        with open(os.path.join(tmp_dir, COMPILED_SOURCE_FILE), 'w') as f:
+            f.write(source_stamp)
+
+    if os.path.isdir(export_dir) and compiled_source_stamp(export_dir) != source_stamp:
+        # Traced from older weights: move it aside so the rename below can replace it
+        stale_dir = f"{export_dir}.stale-{os.getpid()}"
+        try:
+            os.rename(export_dir, stale_dir)
+            shutil.rmtree(stale_dir, ignore_errors=True)
+        except OSError:
+            pass
+    try:
+        os.rename(tmp_dir, export_dir)
+    except OSError:
+        # Another process finished first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return module
+
+
+class CompiledBackend:
+    """Keras model served through a pre-traced (optionally XLA-compiled) tf.function.
+
+    Skips Model.predict's per-call data adapter and loop setup. The traced
+    function is saved to COMPILED_MODEL_DIR the first time, so later worker
+    starts load the graph instead of tracing again. The export records the
+    mtime and size of the Keras file it came from and is traced again when
+    new weights are deployed.
+    """
+
+    name = 'compiled'
+
+    def __init__(self, export_dir=COMPILED_MODEL_DIR, model_path=KERAS_MODEL_PATH, xla=INFERENCE_XLA):
+        import tensorflow as tf
+
+        self.model_path = export_dir
+        self.xla = xla
+        source_stamp = file_stamp(model_path)
+        if not os.path.isdir(export_dir) or compiled_source_stamp(export_dir) != source_stamp:
+            if os.path.isdir(export_dir):
+                print(f"⚠️ {export_dir} was traced from a different {model_path}, tracing it again")
+            print(f"Tracing serving function from {model_path} into {export_dir}...")
+            save_compiled_model(tf.keras.models.load_model(model_path), export_dir, xla, source_stamp)
+        self.module = tf.saved_model.load(export_dir)
+        self.serve = self.module.serve
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        count = len(batch)
+
+        # XLA compiles once per input shape, so pad to a power of two to bound recompiles
+        if self.xla:
+            padded = 1 << (count - 1).bit_length()
+            if padded != count:
+                batch = np.concatenate([batch, np.zeros((padded - count,) + batch.shape[1:], np.float32)])
+
+        return self.serve(batch).numpy()[:count]
+
+
+class TFLiteBackend:
+    """TFLite model (float16 or int8 post-training quantized)"""
+
+    def __init__(self, name, model_path, num_threads=None):
+        self.name = name
+        self.model_path = model_path
+        Interpreter = get_tflite_interpreter_class()
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads or os.cpu_count())
+        self.interpreter.allocate_tensors()
+        self.input_detail = self.interpreter.get_input_details()[0]
+        self.output_detail = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input_detail['shape'][0])
+        # The interpreter is not thread-safe
+        self.lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_detail['index'], [batch_size, 224, 224, 3])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+
+        # Quantize the input if the model expects integer tensors
+        input_dtype = self.input_detail['dtype']
+        if input_dtype != np.float32:
+            scale, zero_point = self.input_detail['quantization']
+            info = np.iinfo(input_dtype)
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(input_dtype)
+
+        with self.lock:
+            self._resize(len(batch))
+            self.interpreter.set_tensor(self.input_detail['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self.output_detail['index']).copy()
+
+        # Dequantize integer outputs back to probabilities
+        if self.output_detail['dtype'] != np.float32:
+            scale, zero_point = self.output_detail['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+
+        return output
+
+
+def warm_up(backend, iterations=2):
+    """Run dummy inferences so graph building and allocation happen before real traffic"""
+    batch = np.zeros((1, 224, 224, 3), dtype=np.float32)
+    for _ in range(iterations):
+        backend.predict(batch)
+
+
+def get_backend_model_path(name=None):
+    """Return the model file the configured backend will load"""
+    name = name or INFERENCE_BACKEND
+    if name == 'keras':
+        return KERAS_MODEL_PATH
+    if name == 'compiled':
+        return COMPILED_MODEL_DIR if os.path.isdir(COMPILED_MODEL_DIR) else KERAS_MODEL_PATH
+    return TFLITE_MODEL_PATHS.get(name)
+
+
+def get_model_version(name=None):
+    """Identify the model being served, so caches keyed by it go stale when the model file changes"""
+    name = name or INFERENCE_BACKEND
+    # The compiled export is rebuilt from the Keras file, so that file is what identifies its weights
+    path = KERAS_MODEL_PATH if name == 'compiled' else get_backend_model_path(name)
+    return f"{name}:{file_stamp(path) or 'missing'}"
+
+
+def load_backend(name=None):
+    """Create the inference backend selected by INFERENCE_BACKEND"""
+    name = name or INFERENCE_BACKEND
+    if name == 'keras':
+        return KerasBackend()
+    if name == 'compiled':
+        return CompiledBackend()
+    if name in TFLITE_MODEL_PATHS:
+        return TFLiteBackend(name, TFLITE_MODEL_PATHS[name])
+    raise ValueError(f"Unknown INFERENCE_BACKEND '{name}' (expected keras, compiled, tflite_fp16 or tflite_int8)")
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+import metrics
+
+# How often to check whether food_nutrition changed (one tiny aggregate query)
+NUTRITION_TABLE_REFRESH_SECONDS = float(os.environ.get('NUTRITION_TABLE_REFRESH_SECONDS', 60))
+
+# 'top1' uses the predicted class's row, 'weighted' blends the top-k classes by probability
+NUTRITION_ESTIMATE_MODE = os.environ.get('NUTRITION_ESTIMATE_MODE', 'top1')
+NUTRITION_ESTIMATE_TOP_K = int(os.environ.get('NUTRITION_ESTIMATE_TOP_K', 3))
+
+NUTRITION_DTYPE = np.dtype([
+    ('calories', np.float32),
+    ('protein', np.float32),
+    ('carbs', np.float32),
+    ('fat', np.float32),
+    ('health_score', np.float32),
+    ('serving_size', 'U32'),
+    ('category', 'U20'),
+    ('in_database', np.bool_),
+])
+MACRO_FIELDS = ['calories', 'protein', 'carbs', 'fat', 'health_score']
+
+# Used for classes missing from food_nutrition
+DEFAULT_NUTRITION = (250, 10, 30, 10, 50, '', '', False)
+
+FINGERPRINT_QUERY = '''
+    SELECT COUNT(*) AS row_count,
+           COALESCE(SUM(calories + protein + carbs + fat + health_score), 0) AS checksum
+    FROM food_nutrition
+'''
+
+
+class NutritionTable:
+    """food_nutrition held in memory as a NumPy structured array indexed by model class index.
+
+    Loaded once and re-read only when a periodic fingerprint check (row count
+    and column checksum) shows the table changed, so predictions get their
+    nutrition without a per-request query.
+    """
+
+    def __init__(self, class_names):
+        self.class_names = list(class_names)
+        self.class_index = {name: i for i, name in enumerate(self.class_names)}
+        self.rows = None
+        self.macros = None
+        self.fingerprint = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def _fingerprint(self, cursor):
+        cursor.execute(FINGERPRINT_QUERY)
+        row = cursor.fetchone()
+        return int(row['row_count']), float(row['checksum'])
+
+    def _load(self, cursor, fingerprint):
+        cursor.execute('SELECT * FROM food_nutrition')
+        rows = np.array([DEFAULT_NUTRITION] * len(self.class_names), dtype=NUTRITION_DTYPE)
+        for record in cursor.fetchall():
+            record = dict(record)
+            idx = self.class_index.get(record['food_name'])
+            if idx is None:
+                continue
+            macros = tuple(record[field] or 0 for field in MACRO_FIELDS)
+            rows[idx] = macros + (record.get('serving_size') or '', record.get('category') or '', True)
+
+        # Swap in the new arrays together; readers keep whichever pair they already hold
+        macros = np.ascontiguousarray(np.stack([rows[field] for field in MACRO_FIELDS], axis=1))
+        self.rows, self.macros = rows, macros
+        self.fingerprint = fingerprint
+        metrics.inc('nutrition_table_loads')
+
+    def refresh(self, cursor, force=False):
+        """Reload the table if it has never been loaded or food_nutrition changed"""
+        now = time.monotonic()
+        if not force and self.rows is not None and now - self.checked_at < NUTRITION_TABLE_REFRESH_SECONDS:
+            return
+        with self.lock:
+            if not force and self.rows is not None and now - self.checked_at < NUTRITION_TABLE_REFRESH_SECONDS:
+                return
+            fingerprint = self._fingerprint(cursor)
+            if force or fingerprint != self.fingerprint:
+                self._load(cursor, fingerprint)
+            self.checked_at = now
+
+    def invalidate(self):
+        """Force a reload on next use (call after writing food_nutrition in this process)"""
+        self.checked_at = 0.0
+        self.fingerprint = None
+
+    def _row_to_dict(self, idx):
+        row = self.rows[idx]
+        nutrition = {
+            'food_name': self.class_names[idx],
+            'calories': float(row['calories']),
+            'protein': float(row['protein']),
+            'carbs': float(row['carbs']),
+            'fat': float(row['fat']),
+            'health_score': int(row['health_score']),
+        }
+        if row['serving_size']:
+            nutrition['serving_size'] = str(row['serving_size'])
+        if row['category']:
+            nutrition['category'] = str(row['category'])
+        return nutrition
+
+    def lookup(self, cursor, food_name):
+        """Nutrition for one class name (defaults if it isn't in food_nutrition)"""
+        self.refresh(cursor)
+        idx = self.class_index.get(food_name)
+        if idx is None:
+            calories, protein, carbs, fat, health_score = DEFAULT_NUTRITION[:5]
+            return {'food_name': food_name, 'calories': calories, 'protein': protein,
+                    'carbs': carbs, 'fat': fat, 'health_score': health_score}
+        return self._row_to_dict(idx)
+
+    def in_database(self, cursor, food_name):
+        """Whether food_nutrition has a row for the class name"""
+        self.refresh(cursor)
+        idx = self.class_index.get(food_name)
+        return idx is not None and bool(self.rows[idx]['in_database'])
+
+    def estimate(self, cursor, probabilities, top_k=NUTRITION_ESTIMATE_TOP_K):
+        """Probability-weighted nutrition over the top-k classes of a softmax vector"""
+        self.refresh(cursor)
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        top_k = max(1, min(top_k, len(probabilities)))
+        top = np.argpartition(probabilities, -top_k)[-top_k:]
+        top = top[np.argsort(probabilities[top])[::-1]]
+
+        weights = probabilities[top]
+        weights = weights / weights.sum() if weights.sum() > 0 else np.full(top_k, 1.0 / top_k, np.float32)
+        calories, protein, carbs, fat, health_score = weights @ self.macros[top]
+
+        return {
+            'food_name': self.class_names[top[0]],
+            'calories': round(float(calories), 1),
+            'protein': round(float(protein), 1),
+            'carbs': round(float(carbs), 1),
+            'fat': round(float(fat), 1),
+            'health_score': int(round(float(health_score))),
+            'estimate': {
+                'mode': 'weighted',
+                'classes': [{'food_name': self.class_names[i], 'probability': round(float(probabilities[i]), 4)}
+                            for i in top]
+            }
+        }
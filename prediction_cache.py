@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+import metrics
+
+PREDICTION_CACHE_ENABLED = os.environ.get('PREDICTION_CACHE_ENABLED', '1') == '1'
+PREDICTION_CACHE_MAX_DISTANCE = int(os.environ.get('PREDICTION_CACHE_MAX_DISTANCE', 4))
+PREDICTION_CACHE_TTL_SECONDS = float(os.environ.get('PREDICTION_CACHE_TTL_SECONDS', 3600))
+PREDICTION_CACHE_MAX_ENTRIES = int(os.environ.get('PREDICTION_CACHE_MAX_ENTRIES', 4096))
+PREDICTION_CACHE_MAX_BYTES = int(os.environ.get('PREDICTION_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+
+# Rough per-entry cost on top of the stored vector (dict slot, key tuple, ints)
+ENTRY_OVERHEAD_BYTES = 200
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II matrix"""
+    k = np.arange(n)[:, np.newaxis]
+    i = np.arange(n)[np.newaxis, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+
+DCT_MATRIX = _dct_matrix(DCT_SIZE)
+
+
+def perceptual_hash(img):
+    """64-bit DCT perceptual hash (pHash) of a PIL image"""
+    gray = np.asarray(img.convert('L').resize((DCT_SIZE, DCT_SIZE), Image.BILINEAR), dtype=np.float64)
+    dct = DCT_MATRIX @ gray @ DCT_MATRIX.T
+    # Keep the lowest frequencies, skipping the DC term so overall brightness doesn't matter
+    low = dct[:HASH_SIZE, :HASH_SIZE].flatten()[1:]
+    bits = low > np.median(low)
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+class PredictionCache:
+    """LRU/TTL cache of prediction vectors keyed by (model version, perceptual hash).
+
+    Lookups first try an exact hash match, then accept the closest stored hash
+    within max_distance bits, so re-uploads and near-identical burst shots
+    skip the model entirely.
+    """
+
+    def __init__(self, model_version, max_distance=PREDICTION_CACHE_MAX_DISTANCE,
+                 ttl=PREDICTION_CACHE_TTL_SECONDS, max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+                 max_bytes=PREDICTION_CACHE_MAX_BYTES):
+        self.model_version = model_version
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes_used = 0
+        self.lock = threading.Lock()
+        metrics.set_gauge('prediction_cache_model_version', model_version)
+
+    def _find(self, key_hash):
+        key = (self.model_version, key_hash)
+        if key in self.entries:
+            return key
+
+        if self.max_distance <= 0:
+            return None
+
+        best_key, best_distance = None, self.max_distance + 1
+        for version, stored_hash in self.entries:
+            if version != self.model_version:
+                continue
+            distance = (stored_hash ^ key_hash).bit_count()
+            if distance < best_distance:
+                best_key, best_distance = (version, stored_hash), distance
+        return best_key
+
+    def _remove(self, key):
+        predictions, _ = self.entries.pop(key)
+        self.bytes_used -= predictions.nbytes + ENTRY_OVERHEAD_BYTES
+
+    def get(self, image_hash):
+        """Return the cached prediction vector for this (or a near-identical) image, or None"""
+        now = time.monotonic()
+        with self.lock:
+            key = self._find(image_hash)
+            if key is not None:
+                predictions, expires_at = self.entries[key]
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    metrics.inc('prediction_cache_hits')
+                    return predictions
+                self._remove(key)
+        metrics.inc('prediction_cache_misses')
+        return None
+
+    def put(self, image_hash, predictions):
+        predictions = np.array(predictions, dtype=np.float32)
+        key = (self.model_version, image_hash)
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (predictions, time.monotonic() + self.ttl)
+            self.bytes_used += predictions.nbytes + ENTRY_OVERHEAD_BYTES
+
+            # Evict least recently used entries
+            while self.entries and (len(self.entries) > self.max_entries or self.bytes_used > self.max_bytes):
+                self._remove(next(iter(self.entries)))
+                metrics.inc('prediction_cache_evictions')
+
+            metrics.set_gauge('prediction_cache_entries', len(self.entries))
+            metrics.set_gauge('prediction_cache_bytes', self.bytes_used)
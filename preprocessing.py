@@ -0,0 +1,40 @@
+import io
+
+import numpy as np
+from PIL import Image, ImageOps
+
+MODEL_INPUT_SIZE = (224, 224)
+MODEL_INPUT_SHAPE = (224, 224, 3)
+
+
+def decode_image(data, size=MODEL_INPUT_SIZE):
+    """Decode uploaded image bytes straight to a model-sized RGB image.
+
+    For JPEGs, draft mode lets libjpeg downscale in the DCT domain (by 1/2, 1/4
+    or 1/8), so a 12-megapixel photo is decoded at the smallest scale that is
+    still at least `size`, never at full resolution. EXIF orientation is applied
+    so rotated phone photos reach the model upright. The remaining resize uses
+    reduce() for any large integer factor and then a bilinear filter.
+    """
+    img = Image.open(io.BytesIO(data))
+    img.draft('RGB', size)
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('RGB')
+    if img.size != size:
+        img = img.resize(size, Image.BILINEAR, reducing_gap=2.0)
+    return img
+
+
+def preprocess_into(pixels, out):
+    """Scale uint8 RGB pixels to [-1, 1] float32, writing into a preallocated array.
+
+    Gives exactly the values of mobilenet_v2.preprocess_input (x / 127.5 - 1 in
+    float32) without its intermediate copies or TensorFlow ops. Arrays that are
+    already float are taken as preprocessed and copied as-is.
+    """
+    if pixels.dtype == np.uint8:
+        np.divide(pixels, np.float32(127.5), out=out, dtype=np.float32)
+        np.subtract(out, np.float32(1.0), out=out)
+    else:
+        out[...] = pixels
+    return out
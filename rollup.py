@@ -0,0 +1,332 @@
+"""
+Maintenance for the aggregate tables derived from food_logs and user_achievements:
+daily_user_totals (one row per user per day) and user_totals (lifetime sums per user).
+
+Usage:
+    python rollup.py check [--user ID]      # compare the aggregates with their sources
+    python rollup.py check --repair         # ...and rebuild the users that drifted
+    python rollup.py rebuild [--user ID]    # recompute them from their sources
+
+log_meals() and award_achievements() keep both tables current in the same
+transaction as their inserts. These commands are for backfills and for
+repairing drift.
+"""
+import argparse
+from datetime import date, timedelta
+
+from data_version import bump_data_version
+from db import is_postgres, unit_of_work
+
+# Floats summed in a different order can differ in the last digits
+TOLERANCE = 0.01
+
+TOTAL_COLUMNS = ['meals_logged', 'total_points', 'total_calories', 'total_protein', 'total_carbs', 'total_fat']
+LIFETIME_COLUMNS = ['meals_logged', 'meal_points', 'achievement_points',
+                    'total_calories', 'total_protein', 'total_carbs', 'total_fat']
+STREAK_COLUMNS = ['current_streak', 'longest_streak']
+
+# Lifetime sums per user, recomputed from the source tables
+LIFETIME_TOTALS_QUERY = '''
+    SELECT u.user_id,
+           COALESCE(f.meals_logged, 0) as meals_logged, COALESCE(f.meal_points, 0) as meal_points,
+           COALESCE(a.achievement_points, 0) as achievement_points,
+           COALESCE(f.total_calories, 0) as total_calories, COALESCE(f.total_protein, 0) as total_protein,
+           COALESCE(f.total_carbs, 0) as total_carbs, COALESCE(f.total_fat, 0) as total_fat
+    FROM users u
+    LEFT JOIN (
+        SELECT user_id, COUNT(*) as meals_logged, SUM(points_awarded) as meal_points,
+               SUM(calories) as total_calories, SUM(protein) as total_protein,
+               SUM(carbs) as total_carbs, SUM(fat) as total_fat
+        FROM food_logs GROUP BY user_id
+    ) f ON f.user_id = u.user_id
+    LEFT JOIN (
+        SELECT user_id, SUM(points_awarded) as achievement_points
+        FROM user_achievements GROUP BY user_id
+    ) a ON a.user_id = u.user_id
+'''
+
+
+def update_daily_totals(cursor, user_id, day, points, nutrition, meals=1):
+    """Add meals to the user's row for that day (call in the same transaction as the food_logs insert)"""
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('''
+            INSERT INTO daily_user_totals
+            (user_id, day, meals_logged, total_points, total_calories, total_protein, total_carbs, total_fat)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT(user_id, day) DO UPDATE SET
+                meals_logged = daily_user_totals.meals_logged + EXCLUDED.meals_logged,
+                total_points = daily_user_totals.total_points + EXCLUDED.total_points,
+                total_calories = daily_user_totals.total_calories + EXCLUDED.total_calories,
+                total_protein = daily_user_totals.total_protein + EXCLUDED.total_protein,
+                total_carbs = daily_user_totals.total_carbs + EXCLUDED.total_carbs,
+                total_fat = daily_user_totals.total_fat + EXCLUDED.total_fat
+        ''', (user_id, day, meals, points,
+              nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
+    else:
+        # SQLite
+        cursor.execute('''
+            INSERT INTO daily_user_totals
+            (user_id, day, meals_logged, total_points, total_calories, total_protein, total_carbs, total_fat)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, day) DO UPDATE SET
+                meals_logged = meals_logged + excluded.meals_logged,
+                total_points = total_points + excluded.total_points,
+                total_calories = total_calories + excluded.total_calories,
+                total_protein = total_protein + excluded.total_protein,
+                total_carbs = total_carbs + excluded.total_carbs,
+                total_fat = total_fat + excluded.total_fat
+        ''', (user_id, str(day), meals, points,
+              nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
+
+
+def update_user_totals(cursor, user_id, meal_points=0, nutrition=None, meals=1, achievement_points=0):
+    """Add logged meals and/or awarded achievement points to the user's lifetime sums"""
+    if nutrition is None:
+        nutrition = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
+        meals = 0
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('''
+            INSERT INTO user_totals
+            (user_id, meals_logged, meal_points, achievement_points,
+             total_calories, total_protein, total_carbs, total_fat)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT(user_id) DO UPDATE SET
+                meals_logged = user_totals.meals_logged + EXCLUDED.meals_logged,
+                meal_points = user_totals.meal_points + EXCLUDED.meal_points,
+                achievement_points = user_totals.achievement_points + EXCLUDED.achievement_points,
+                total_calories = user_totals.total_calories + EXCLUDED.total_calories,
+                total_protein = user_totals.total_protein + EXCLUDED.total_protein,
+                total_carbs = user_totals.total_carbs + EXCLUDED.total_carbs,
+                total_fat = user_totals.total_fat + EXCLUDED.total_fat
+        ''', (user_id, meals, meal_points, achievement_points,
+              nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
+    else:
+        # SQLite
+        cursor.execute('''
+            INSERT INTO user_totals
+            (user_id, meals_logged, meal_points, achievement_points,
+             total_calories, total_protein, total_carbs, total_fat)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(user_id) DO UPDATE SET
+                meals_logged = meals_logged + excluded.meals_logged,
+                meal_points = meal_points + excluded.meal_points,
+                achievement_points = achievement_points + excluded.achievement_points,
+                total_calories = total_calories + excluded.total_calories,
+                total_protein = total_protein + excluded.total_protein,
+                total_carbs = total_carbs + excluded.total_carbs,
+                total_fat = total_fat + excluded.total_fat
+        ''', (user_id, meals, meal_points, achievement_points,
+              nutrition['calories'], nutrition['protein'], nutrition['carbs'], nutrition['fat']))
+
+
+def get_user_totals(cursor, user_id):
+    """The user's lifetime sums in one primary-key read (zeros if nothing was logged yet)"""
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('SELECT * FROM user_totals WHERE user_id = %s', (user_id,))
+    else:
+        # SQLite
+        cursor.execute('SELECT * FROM user_totals WHERE user_id = ?', (user_id,))
+    row = cursor.fetchone()
+    if row:
+        return dict(row)
+    return dict({column: 0 for column in LIFETIME_COLUMNS + STREAK_COLUMNS}, user_id=user_id, last_log_day=None)
+
+
+def _as_date(value):
+    return date.fromisoformat(str(value)[:10]) if value else None
+
+
+def compute_streaks(days):
+    """(current streak ending on the last day, longest streak, last day) for sorted distinct days"""
+    current = longest = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+        previous = day
+    return current, longest, previous
+
+
+def _logged_days(cursor, user_id=None):
+    """Each user's distinct logged days, in order, from the daily rollup"""
+    where, params = _user_filter(cursor, user_id)
+    cursor.execute('SELECT user_id, day FROM daily_user_totals' + where + ' ORDER BY user_id, day', params)
+    days = {}
+    for row in cursor.fetchall():
+        days.setdefault(row['user_id'], []).append(_as_date(row['day']))
+    return days
+
+
+def _store_streak(cursor, user_id, current, longest, last_day):
+    if is_postgres(cursor):
+        # PostgreSQL
+        cursor.execute('''
+            UPDATE user_totals SET current_streak = %s, longest_streak = %s, last_log_day = %s
+            WHERE user_id = %s
+        ''', (current, longest, last_day, user_id))
+    else:
+        # SQLite
+        cursor.execute('''
+            UPDATE user_totals SET current_streak = ?, longest_streak = ?, last_log_day = ?
+            WHERE user_id = ?
+        ''', (current, longest, str(last_day) if last_day else None, user_id))
+
+
+def advance_streak_days(cursor, user_id, days):
+    """Move the user's streak state forward for meals on `days` and return their updated totals.
+
+    Meals on new days extend or restart the streak from the stored state;
+    back-dated meals recompute it from the daily rollup. The state is stored once.
+    """
+    totals = get_user_totals(cursor, user_id)
+    last_day = _as_date(totals['last_log_day'])
+    new_days = sorted(set(days) - {last_day})
+    if not new_days:
+        return totals
+
+    if last_day is None or new_days[0] > last_day:
+        current, longest = totals['current_streak'], totals['longest_streak']
+        for day in new_days:
+            current = current + 1 if last_day == day - timedelta(days=1) else 1
+            longest = max(longest, current)
+            last_day = day
+    else:
+        current, longest, last_day = compute_streaks(_logged_days(cursor, user_id).get(user_id, []))
+
+    _store_streak(cursor, user_id, current, longest, last_day)
+    totals.update(current_streak=current, longest_streak=longest, last_log_day=last_day)
+    return totals
+
+
+def rebuild_streaks(cursor, user_id=None):
+    """Recompute streak state from the daily rollup"""
+    for uid, days in _logged_days(cursor, user_id).items():
+        _store_streak(cursor, uid, *compute_streaks(days))
+
+
+def _user_filter(cursor, user_id, column='user_id'):
+    if user_id is None:
+        return '', ()
+    return f' WHERE {column} = ' + ('%s' if is_postgres(cursor) else '?'), (user_id,)
+
+
+def _diff(expected, actual, columns):
+    """(key, column, actual value, expected value) for every column that differs; missing rows count as zeros"""
+    mismatches = []
+    for key in sorted(expected.keys() | actual.keys()):
+        for column in columns:
+            want = float(expected[key][column]) if key in expected else 0.0
+            have = float(actual[key][column]) if key in actual else 0.0
+            if abs(want - have) > TOLERANCE:
+                mismatches.append((key, column, have, want))
+    return mismatches
+
+
+def rebuild_daily_totals(cursor, user_id=None):
+    """Recompute the rollup from food_logs, for one user or everyone"""
+    where, params = _user_filter(cursor, user_id)
+    if is_postgres(cursor):
+        # Meals logged meanwhile wait on the lock and add themselves on top after the rebuild commits
+        cursor.execute('LOCK TABLE daily_user_totals IN EXCLUSIVE MODE')
+    cursor.execute('DELETE FROM daily_user_totals' + where, params)
+    cursor.execute('''
+        INSERT INTO daily_user_totals
+        (user_id, day, meals_logged, total_points, total_calories, total_protein, total_carbs, total_fat)
+        SELECT user_id, DATE(logged_at), COUNT(*),
+               COALESCE(SUM(points_awarded), 0), COALESCE(SUM(calories), 0), COALESCE(SUM(protein), 0),
+               COALESCE(SUM(carbs), 0), COALESCE(SUM(fat), 0)
+        FROM food_logs''' + where + '''
+        GROUP BY user_id, DATE(logged_at)
+    ''', params)
+
+
+def check_daily_totals(cursor, user_id=None):
+    """List (user_id, day, column, rollup value, food_logs value) for every disagreement"""
+    where, params = _user_filter(cursor, user_id)
+    cursor.execute('''
+        SELECT user_id, DATE(logged_at) as day, COUNT(*) as meals_logged,
+               COALESCE(SUM(points_awarded), 0) as total_points, COALESCE(SUM(calories), 0) as total_calories,
+               COALESCE(SUM(protein), 0) as total_protein, COALESCE(SUM(carbs), 0) as total_carbs,
+               COALESCE(SUM(fat), 0) as total_fat
+        FROM food_logs''' + where + '''
+        GROUP BY user_id, DATE(logged_at)
+    ''', params)
+    expected = {(row['user_id'], str(row['day'])): row for row in cursor.fetchall()}
+
+    cursor.execute('SELECT * FROM daily_user_totals' + where, params)
+    actual = {(row['user_id'], str(row['day'])): row for row in cursor.fetchall()}
+
+    return [(user_id, day, column, have, want)
+            for (user_id, day), column, have, want in _diff(expected, actual, TOTAL_COLUMNS)]
+
+
+def rebuild_user_totals(cursor, user_id=None):
+    """Recompute lifetime sums from food_logs and user_achievements, for one user or everyone"""
+    where, params = _user_filter(cursor, user_id)
+    if is_postgres(cursor):
+        # Same as the daily rollup: concurrent writers wait and apply on top of the rebuilt rows
+        cursor.execute('LOCK TABLE user_totals IN EXCLUSIVE MODE')
+    cursor.execute('DELETE FROM user_totals' + where, params)
+    user_where, _ = _user_filter(cursor, user_id, 'u.user_id')
+    cursor.execute('''
+        INSERT INTO user_totals
+        (user_id, meals_logged, meal_points, achievement_points,
+         total_calories, total_protein, total_carbs, total_fat)
+        SELECT user_id, meals_logged, meal_points, achievement_points,
+               total_calories, total_protein, total_carbs, total_fat
+        FROM (''' + LIFETIME_TOTALS_QUERY + user_where + ''') totals
+    ''', params)
+    rebuild_streaks(cursor, user_id)
+
+
+def check_user_totals(cursor, user_id=None):
+    """List (user_id, column, stored value, recomputed value) for every disagreement"""
+    user_where, params = _user_filter(cursor, user_id, 'u.user_id')
+    cursor.execute(LIFETIME_TOTALS_QUERY + user_where, params)
+    expected = {row['user_id']: dict(row, current_streak=0, longest_streak=0) for row in cursor.fetchall()}
+    for uid, days in _logged_days(cursor, user_id).items():
+        current, longest, _ = compute_streaks(days)
+        expected.setdefault(uid, {column: 0 for column in LIFETIME_COLUMNS}).update(
+            current_streak=current, longest_streak=longest)
+
+    where, params = _user_filter(cursor, user_id)
+    cursor.execute('SELECT * FROM user_totals' + where, params)
+    actual = {row['user_id']: row for row in cursor.fetchall()}
+
+    return _diff(expected, actual, LIFETIME_COLUMNS + STREAK_COLUMNS)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check or rebuild daily_user_totals and user_totals')
+    parser.add_argument('command', choices=['check', 'rebuild'])
+    parser.add_argument('--user', type=int, help='Only this user_id (default: everyone)')
+    parser.add_argument('--repair', action='store_true', help='With check: rebuild users that have drifted')
+    args = parser.parse_args()
+
+    with unit_of_work() as cursor:
+        if args.command == 'rebuild':
+            rebuild_daily_totals(cursor, args.user)
+            rebuild_user_totals(cursor, args.user)
+            bump_data_version(cursor, args.user)
+            print("✅ Rebuilt daily_user_totals and user_totals" + (f" for user {args.user}" if args.user else ""))
+        else:
+            drifted = set()
+            for user_id, day, column, have, want in check_daily_totals(cursor, args.user):
+                print(f"daily_user_totals user {user_id} {day} {column}: stored {have} != food_logs {want}")
+                drifted.add(user_id)
+            for user_id, column, have, want in check_user_totals(cursor, args.user):
+                print(f"user_totals user {user_id} {column}: stored {have} != recomputed {want}")
+                drifted.add(user_id)
+            print(f"{'❌' if drifted else '✅'} {len(drifted)} users with mismatches")
+
+            if args.repair:
+                for user_id in sorted(drifted):
+                    rebuild_daily_totals(cursor, user_id)
+                    rebuild_user_totals(cursor, user_id)
+                    bump_data_version(cursor, user_id)
+                print(f"✅ Repaired {len(drifted)} users")
+    if args.command == 'check' and drifted and not args.repair:
+        raise SystemExit(1)
@@ -0,0 +1,157 @@
+"""
+Where uploaded images and their thumbnails are kept.
+
+STORAGE_BACKEND=local (default) keeps them under the upload folder on this
+instance's disk. STORAGE_BACKEND=s3 keeps them in an S3-compatible bucket
+(AWS S3, MinIO, ...), so any number of instances can share them, and
+serves them through presigned GET redirects instead of the web workers.
+
+Usage:
+    python storage.py migrate [--dry-run]    # copy local uploads into the configured S3 bucket
+"""
+import argparse
+import io
+import os
+
+import metrics
+from image_store import write_atomic
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local')
+S3_BUCKET = os.environ.get('S3_BUCKET')
+S3_PREFIX = os.environ.get('S3_PREFIX', 'uploads/')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+S3_REGION = os.environ.get('S3_REGION', 'us-east-1')
+S3_PRESIGN_EXPIRES = int(os.environ.get('S3_PRESIGN_EXPIRES_SECONDS', 3600))
+# Objects larger than this are sent as a multipart upload, in parts of this size
+S3_MULTIPART_CHUNK_SIZE = int(os.environ.get('S3_MULTIPART_CHUNK_SIZE', 8 * 1024 * 1024))
+
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'gif': 'image/gif', 'bmp': 'image/bmp', 'webp': 'image/webp'}
+# Stored files never change: a new upload gets a new content-hash name
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def content_type(path):
+    return CONTENT_TYPES.get(path.rsplit('.', 1)[-1].lower(), 'application/octet-stream')
+
+
+class LocalStorage:
+    """Files under a directory on this instance's disk"""
+
+    presigned = False
+
+    def __init__(self, root):
+        self.root = root
+
+    def _full_path(self, path):
+        return os.path.join(self.root, path)
+
+    def exists(self, path):
+        return os.path.exists(self._full_path(path))
+
+    def read(self, path):
+        """The file's bytes; raises FileNotFoundError if it doesn't exist"""
+        with open(self._full_path(path), 'rb') as f:
+            return f.read()
+
+    def save(self, path, data, fsync=True):
+        write_atomic(self._full_path(path), data, fsync)
+
+
+class S3Storage:
+    """Objects in an S3-compatible bucket, keyed by S3_PREFIX + path"""
+
+    presigned = True
+
+    def __init__(self, bucket=S3_BUCKET, prefix=S3_PREFIX, endpoint_url=S3_ENDPOINT_URL, region=S3_REGION):
+        # Imported here so the local backend doesn't need boto3
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.exceptions import ClientError
+
+        if not bucket:
+            raise RuntimeError('S3_BUCKET must be set when STORAGE_BACKEND=s3')
+        self.bucket = bucket
+        self.prefix = prefix
+        # boto3 clients are thread-safe, so one serves the writer thread and every request thread
+        self.client = boto3.client('s3', endpoint_url=endpoint_url, region_name=region)
+        self.transfer_config = TransferConfig(multipart_threshold=S3_MULTIPART_CHUNK_SIZE,
+                                              multipart_chunksize=S3_MULTIPART_CHUNK_SIZE)
+        self.client_error = ClientError
+
+    def _key(self, path):
+        return self.prefix + path
+
+    def exists(self, path):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(path))
+            return True
+        except self.client_error as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def read(self, path):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(path))
+        except self.client_error as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(path)
+            raise
+        return response['Body'].read()
+
+    def save(self, path, data, fsync=True):
+        self.save_stream(path, io.BytesIO(data))
+
+    def save_stream(self, path, fileobj):
+        """Upload from a file object, streamed in multipart chunks when it is large"""
+        self.client.upload_fileobj(fileobj, self.bucket, self._key(path), Config=self.transfer_config,
+                                   ExtraArgs={'ContentType': content_type(path),
+                                              'CacheControl': IMMUTABLE_CACHE_CONTROL})
+        metrics.inc('s3_uploads')
+
+    def url(self, path, expires=S3_PRESIGN_EXPIRES):
+        """Presigned GET URL, so the client downloads straight from the bucket"""
+        return self.client.generate_presigned_url('get_object', Params={'Bucket': self.bucket, 'Key': self._key(path)},
+                                                  ExpiresIn=expires)
+
+
+def get_storage(local_root):
+    """The configured backend (local_root is the upload folder the local backend uses)"""
+    if STORAGE_BACKEND == 's3':
+        return S3Storage()
+    if STORAGE_BACKEND == 'local':
+        return LocalStorage(local_root)
+    raise RuntimeError(f'Unknown STORAGE_BACKEND: {STORAGE_BACKEND}')
+
+
+def migrate_local_files(local_root, target, dry_run=False):
+    """Copy every file under local_root into `target`, skipping ones it already has"""
+    copied = skipped = 0
+    for directory, _, files in os.walk(local_root):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue
+            full_path = os.path.join(directory, name)
+            path = os.path.relpath(full_path, local_root).replace(os.sep, '/')
+            if target.exists(path):
+                skipped += 1
+                continue
+            if not dry_run:
+                with open(full_path, 'rb') as f:
+                    target.save_stream(path, f)
+            copied += 1
+            print(f"{'Would copy' if dry_run else 'Copied'} {path}")
+    return copied, skipped
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upload storage maintenance')
+    parser.add_argument('command', choices=['migrate'])
+    parser.add_argument('--source', default='uploads', help='local upload folder to copy from')
+    parser.add_argument('--dry-run', action='store_true')
+    args = parser.parse_args()
+
+    if STORAGE_BACKEND != 's3':
+        raise SystemExit('Set STORAGE_BACKEND=s3 and the S3_* settings to choose where to migrate to')
+    copied, skipped = migrate_local_files(args.source, S3Storage(), args.dry_run)
+    print(f"✅ {copied} files {'to copy' if args.dry_run else 'copied'}, {skipped} already in the bucket")
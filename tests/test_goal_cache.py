@@ -0,0 +1,69 @@
+import importlib
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+@pytest.fixture(scope='module')
+def api(tmp_path_factory):
+    # api.py migrates its database and creates the upload folder at import time
+    workdir = tmp_path_factory.mktemp('api')
+    os.chdir(workdir)
+    os.environ.pop('DATABASE_URL', None)
+    os.environ['SQLITE_PATH'] = str(workdir / 'test.db')
+    os.environ['PREDICTION_CACHE_ENABLED'] = '0'
+    return importlib.import_module('api')
+
+
+@pytest.fixture
+def client(api, monkeypatch):
+    class FixedPredictor:
+        def predict(self, pixels):
+            predictions = np.zeros(len(api.CLASS_NAMES), dtype=np.float32)
+            predictions[0] = 1.0
+            return predictions
+
+    monkeypatch.setattr(api, 'get_predictor', lambda: FixedPredictor())
+    return api.app.test_client()
+
+
+def auth_headers(client, name):
+    client.post('/api/auth/register', json={'username': name, 'email': f'{name}@example.com', 'password': 'secret123'})
+    token = client.post('/api/auth/login', json={'username': name, 'password': 'secret123'}).get_json()['token']
+    return {'Authorization': f'Bearer {token}'}
+
+
+def predict(client, headers):
+    buf = io.BytesIO()
+    Image.new('RGB', (64, 64), (200, 120, 40)).save(buf, 'PNG')
+    buf.seek(0)
+    response = client.post('/api/predict', data={'image': (buf, 'meal.png')}, headers=headers,
+                           content_type='multipart/form-data')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_second_predict_hits_goal_cache(api, client):
+    headers = auth_headers(client, 'repeat_predictor')
+    predict(client, headers)
+    hits, misses = api.goal_cache.hits, api.goal_cache.misses
+
+    predict(client, headers)
+
+    assert api.goal_cache.hits == hits + 1
+    assert api.goal_cache.misses == misses
+
+
+def test_set_user_goals_invalidates_cached_goal(api, client):
+    headers = auth_headers(client, 'goal_changer')
+    predict(client, headers)
+
+    response = client.post('/api/user/goals', json={'goal_type': 'muscle_gain'}, headers=headers)
+    assert response.status_code == 200
+    misses = api.goal_cache.misses
+
+    assert predict(client, headers)['goal_type'] == 'muscle_gain'
+    assert api.goal_cache.misses == misses + 1
@@ -0,0 +1,64 @@
+import io
+import os
+
+from PIL import Image, ImageOps, features
+
+import metrics
+
+# Square sizes /uploads/<path>?size= can serve
+THUMBNAIL_SIZES = [int(size) for size in os.environ.get('THUMBNAIL_SIZES', '64,200,480').split(',')]
+# Render every size when an upload is stored, instead of on first request (uploads written
+# synchronously under backpressure still render on first request)
+THUMBNAILS_AT_UPLOAD = os.environ.get('THUMBNAILS_AT_UPLOAD', '1') == '1'
+WEBP_SUPPORTED = features.check('webp')
+
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def thumbnail_format(accept_webp):
+    """'webp' for clients that accept it (and a Pillow that can write it), otherwise 'jpg'"""
+    return 'webp' if accept_webp and WEBP_SUPPORTED else 'jpg'
+
+
+def thumbnail_path(path, size, fmt):
+    """Where the thumbnail of an upload is stored, next to the originals"""
+    return f'thumbs/{size}/{os.path.splitext(path)[0]}.{fmt}'
+
+
+def render_thumbnail(data, size, fmt):
+    """A size x size, centre-cropped thumbnail of the image bytes"""
+    with metrics.timer('thumbnail_render_ms'):
+        img = Image.open(io.BytesIO(data))
+        # Let JPEGs decode at the smallest DCT scale that still covers the thumbnail
+        img.draft('RGB', (size, size))
+        img = ImageOps.exif_transpose(img).convert('RGB')
+        img = ImageOps.fit(img, (size, size), Image.LANCZOS)
+        buf = io.BytesIO()
+        pil_format, options = THUMBNAIL_FORMATS[fmt]
+        img.save(buf, pil_format, **options)
+    metrics.inc('thumbnails_rendered')
+    return buf.getvalue()
+
+
+def ensure_thumbnail(storage, path, size, fmt, data=None):
+    """Storage path of the thumbnail, rendering it first if needed.
+
+    `data` is the original's bytes when the caller already has them;
+    otherwise they are read from storage. Raises FileNotFoundError if there
+    is no original.
+    """
+    thumb = thumbnail_path(path, size, fmt)
+    if not storage.exists(thumb):
+        if data is None:
+            data = storage.read(path)
+        storage.save(thumb, render_thumbnail(data, size, fmt), fsync=False)
+    return thumb
+
+
+def render_all(storage, path, data):
+    """Every configured size in the preferred format (an ImageWriter on_write hook)"""
+    for size in THUMBNAIL_SIZES:
+        ensure_thumbnail(storage, path, size, thumbnail_format(True), data)